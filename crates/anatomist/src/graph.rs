@@ -1,11 +1,17 @@
 //! # Reference Graph Builder
 //!
 //! Two-pass pipeline:
-//! 1. **Index Pass**: Walk all `.py` files, extract entities, build `SymbolRegistry`, add nodes to graph.
-//! 2. **Link Pass**: Re-parse each file for imports + call sites, add symbol-to-symbol edges.
-
-use crate::imports::{extract_cpp_includes, extract_imports, resolve_import};
-use crate::{AnatomistError, Entity, ParserHost};
+//! 1. **Index Pass**: Walk all `.py` files, parse each once (on worker threads), extract
+//!    entities plus import statements and call sites, build `SymbolRegistry`, add nodes
+//!    to graph.
+//! 2. **Link Pass**: Resolve the collected imports and call sites into symbol-to-symbol edges.
+
+use crate::imports::{
+    extract_cpp_includes, extract_imports_fallback, import_from_match, resolve_import_cached,
+    CppInclude, DirCache, ImportInfo, IMPORT_PATTERNS,
+};
+use crate::parser::python_parser;
+use crate::{path_util, AnatomistError, Entity, ParserHost};
 use common::registry::{symbol_hash, SymbolEntry, SymbolRegistry};
 use memmap2::Mmap;
 use petgraph::graph::{DiGraph, NodeIndex};
@@ -13,6 +19,7 @@ use petgraph::visit::EdgeRef;
 use petgraph::Direction;
 use std::collections::{HashMap, HashSet};
 use std::fs::File;
+use std::io::Read;
 use std::path::{Path, PathBuf};
 use std::sync::OnceLock;
 use tree_sitter::{Node, Parser, Query, QueryCursor, StreamingIterator};
@@ -130,7 +137,19 @@ impl ReferenceGraph {
     }
 }
 
-static CALL_QUERY: OnceLock<Query> = OnceLock::new();
+/// Tree-sitter patterns for Python call sites (`func()` and `obj.method()`).
+const CALL_PATTERNS: &str = r#"
+    (call
+      function: (identifier) @direct_call)
+
+    (call
+      function: (attribute
+        attribute: (identifier) @attr_call))
+"#;
+
+/// Import and call patterns compiled together, so one cursor pass over the tree
+/// yields both.
+static LINK_QUERY: OnceLock<Query> = OnceLock::new();
 
 /// A call expression extracted from Python source.
 struct CallSite {
@@ -140,28 +159,37 @@ struct CallSite {
     byte_offset: u32,
 }
 
-/// Extracts all call sites from a parsed Python source tree.
-fn extract_calls(source: &[u8], root: Node) -> Vec<CallSite> {
-    let query = CALL_QUERY.get_or_init(|| {
+/// Extracts imports and call sites from a parsed Python source tree in one
+/// query pass.
+///
+/// Calls are only useful for linking against imported names, so they are
+/// discarded when the file has no imports.
+fn extract_links(source: &[u8], root: Node) -> (Vec<ImportInfo>, Vec<CallSite>) {
+    let query = LINK_QUERY.get_or_init(|| {
         Query::new(
             &tree_sitter_python::LANGUAGE.into(),
-            r#"
-            (call
-              function: (identifier) @direct_call)
-
-            (call
-              function: (attribute
-                attribute: (identifier) @attr_call))
-            "#,
+            &format!("{IMPORT_PATTERNS}{CALL_PATTERNS}"),
         )
-        .expect("Invalid call query")
+        .expect("Invalid link query")
     });
+    let direct_call = query.capture_index_for_name("direct_call");
+    let attr_call = query.capture_index_for_name("attr_call");
 
     let mut cursor = QueryCursor::new();
     let mut matches = cursor.matches(query, root, source);
+    let mut imports = Vec::new();
     let mut calls = Vec::new();
 
     while let Some(m) = matches.next() {
+        // Call patterns have a single capture; everything else is an import.
+        let is_call = m
+            .captures
+            .first()
+            .is_some_and(|c| Some(c.index) == direct_call || Some(c.index) == attr_call);
+        if !is_call {
+            imports.extend(import_from_match(query, m, source));
+            continue;
+        }
         for capture in m.captures {
             let node = capture.node;
             let text = match node.utf8_text(source) {
@@ -175,7 +203,139 @@ fn extract_calls(source: &[u8], root: Node) -> Vec<CallSite> {
         }
     }
 
-    calls
+    if imports.is_empty() {
+        imports = extract_imports_fallback(source, root);
+    }
+    if imports.is_empty() {
+        calls = Vec::new();
+    }
+    (imports, calls)
+}
+
+/// Everything Pass 1 learns from one Python file, gathered from a single parse.
+struct PyFileScan {
+    canonical: PathBuf,
+    /// Normalized form of `canonical`; tags the entities and the `__MODULE__` sentinel.
+    file_key: String,
+    entities: Vec<Entity>,
+    file_size: u32,
+    imports: Vec<ImportInfo>,
+    /// Call sites; left empty when the file has no imports (nothing to link).
+    calls: Vec<CallSite>,
+}
+
+/// Link inputs retained from Pass 1 so Pass 2 never re-reads or re-parses a file.
+struct PyLinks {
+    source_canonical: PathBuf,
+    file_key: String,
+    imports: Vec<ImportInfo>,
+    calls: Vec<CallSite>,
+}
+
+/// Include inputs retained from Pass 1b so Pass 2b never re-maps a C++ file.
+struct CppLinks {
+    source_canonical: PathBuf,
+    file_key: String,
+    includes: Vec<CppInclude>,
+}
+
+/// Reads and parses a Python file once, extracting entities, imports, and
+/// call sites from the same tree.
+///
+/// The path is canonicalized exactly once here; the same key tags the entities,
+/// the `__MODULE__` sentinel, and the Pass 2 link inputs.
+fn scan_py_file(
+    host: &ParserHost,
+    parser: &mut Parser,
+    path: &Path,
+) -> Result<PyFileScan, AnatomistError> {
+    let canonical = dunce::canonicalize(path)?;
+    let file_key = path_util::canonical_key(&canonical)?;
+
+    let mut file = File::open(&canonical)?;
+    let file_len = file.metadata()?.len();
+    if file_len > u32::MAX as u64 {
+        return Err(AnatomistError::ByteRangeOverflow);
+    }
+    if file_len == 0 {
+        return Ok(PyFileScan {
+            canonical,
+            file_key,
+            entities: Vec::new(),
+            file_size: 0,
+            imports: Vec::new(),
+            calls: Vec::new(),
+        });
+    }
+
+    // One read into an owned buffer rather than an mmap: this runs on worker
+    // threads, and a mapping would be unsound if the file were truncated mid-scan.
+    let mut buf = Vec::with_capacity(file_len as usize);
+    file.read_to_end(&mut buf)?;
+    let source = &buf[..];
+
+    let (entities, tree) = host.dissect_python_with(parser, source, &file_key)?;
+    // Every `import x` / `from x import y` contains the keyword; a byte scan is
+    // far cheaper than running the link query over a file that has none.
+    let (imports, calls) = if source.windows(6).any(|w| w == b"import") {
+        extract_links(source, tree.root_node())
+    } else {
+        (Vec::new(), Vec::new())
+    };
+
+    Ok(PyFileScan {
+        canonical,
+        file_key,
+        entities,
+        file_size: file_len as u32,
+        imports,
+        calls,
+    })
+}
+
+/// Runs [`scan_py_file`] over `files` on scoped worker threads.
+///
+/// Files are independent in Pass 1, so they are split into one chunk per
+/// available core. Each worker owns a Python parser and shares `host` for its
+/// heuristics. Results come back in `files` order, one per file, so the
+/// serial indexing that follows is unchanged.
+///
+/// # Errors
+/// Returns `AnatomistError::ParseFailure` if a worker cannot load the Python
+/// grammar. Per-file failures are returned in place.
+fn scan_py_files(
+    host: &ParserHost,
+    files: &[PathBuf],
+) -> Result<Vec<Result<PyFileScan, AnatomistError>>, AnatomistError> {
+    if files.is_empty() {
+        return Ok(Vec::new());
+    }
+    let workers = std::thread::available_parallelism()
+        .map_or(1, |n| n.get())
+        .min(files.len());
+    let chunk_size = files.len().div_ceil(workers);
+    std::thread::scope(|scope| -> Result<_, AnatomistError> {
+        let handles: Vec<_> = files
+            .chunks(chunk_size)
+            .map(|chunk| {
+                scope.spawn(move || -> Result<Vec<_>, AnatomistError> {
+                    let mut parser = python_parser()?;
+                    Ok(chunk
+                        .iter()
+                        .map(|path| scan_py_file(host, &mut parser, path))
+                        .collect())
+                })
+            })
+            .collect();
+        let mut scans = Vec::with_capacity(files.len());
+        for handle in handles {
+            let chunk = handle
+                .join()
+                .unwrap_or_else(|e| std::panic::resume_unwind(e))?;
+            scans.extend(chunk);
+        }
+        Ok(scans)
+    })
 }
 
 /// Finds the innermost entity containing `byte_offset`.
@@ -195,22 +355,29 @@ fn find_containing_entity(byte_offset: u32, entries: &[(u64, u32, u32)]) -> Opti
 ///
 /// # Algorithm
 /// 1. Walk directory for `.py` and C++ (`.cpp`, `.cxx`, `.cc`, `.h`, `.hpp`) files.
-/// 2. **Pass 1**: Extract Python entities, populate registry, add graph nodes.
-/// 3. **Pass 1b**: Extract C++ entities, register symbols and `__MODULE__` sentinels.
-/// 4. **Pass 2**: Re-parse Python files for imports + call sites; add symbol-to-symbol edges.
-/// 5. **Pass 2b**: Scan C++ files for `#include "..."` directives; add file-level edges.
+/// 2. **Pass 1**: Parse Python files on worker threads, then (in file order) populate
+///    the registry and add graph nodes.
+/// 3. **Pass 1b**: Extract C++ entities, register symbols and `__MODULE__` sentinels, and
+///    collect `#include "..."` directives from the same mmap.
+/// 4. **Pass 2**: Resolve Python imports + call sites (collected in Pass 1); add symbol-to-symbol edges.
+/// 5. **Pass 2b**: Resolve the includes collected in Pass 1b; add `__MODULE__` → `__MODULE__`
+///    file-level edges.
 ///
 /// # Memory
 /// - Registry stores all symbols (~80 bytes per symbol)
 /// - Graph stores node indices (8 bytes per node) + edges (~16 bytes per edge)
-/// - Per-file `Vec<Entity>` is dropped after indexing
+/// - Pass 1 holds every Python file's scan (entities, imports, call sites) at once:
+///   worker results are collected before indexing starts
+/// - Entities are moved into [`ReferenceGraph::entities`] during indexing, not dropped
+/// - `py_links` retains every import and every call site (one `String` each) of each
+///   file with at least one import until Pass 2 finishes; files without imports keep
+///   nothing. C++ include lists are likewise retained until Pass 2b
 pub fn build_reference_graph(
     project_root: &Path,
     host: &mut ParserHost,
 ) -> Result<ReferenceGraph, AnatomistError> {
     let root = dunce::canonicalize(project_root)?;
-    let py_files = walk_py_files(&root)?;
-    let cpp_files = walk_cpp_files(&root)?;
+    let (py_files, cpp_files) = walk_source_files(&root)?;
 
     let mut registry = SymbolRegistry::new();
     let mut graph = DiGraph::new();
@@ -222,17 +389,19 @@ pub fn build_reference_graph(
         ..Default::default()
     };
 
-    // PASS 1: Index symbols
-    for path in &py_files {
-        match host.dissect(path) {
-            Ok(entities) => {
-                // Compute canonical file key for __MODULE__ sentinel
-                let canonical = dunce::canonicalize(path).unwrap_or_else(|_| path.to_path_buf());
-                let file_key = normalize_path(&canonical);
-                let file_size = std::fs::metadata(path)
-                    .map(|m| m.len().min(u32::MAX as u64) as u32)
-                    .unwrap_or(0);
-
+    let mut py_links: Vec<PyLinks> = Vec::with_capacity(py_files.len());
+
+    // PASS 1: Index symbols (one parse per file; imports + call sites kept for Pass 2)
+    for scan in scan_py_files(host, &py_files)? {
+        match scan {
+            Ok(PyFileScan {
+                canonical,
+                file_key,
+                entities,
+                file_size,
+                imports,
+                calls,
+            }) => {
                 // Insert __MODULE__ virtual entry covering the entire file.
                 // Module-level calls (outside any func/class) are attributed to this symbol.
                 let module_sym_id = format!("{}::__MODULE__", file_key);
@@ -252,7 +421,13 @@ pub fn build_reference_graph(
                 });
                 let module_node = graph.add_node(module_hash);
                 id_to_node.insert(module_hash, module_node);
-                file_symbols.entry(file_key).or_default().push(module_hash);
+                // Every entity of this file carries `file_key` as its path: the sentinel
+                // and all entity ids go into `file_symbols` through a single map lookup.
+                let symbol_ids = file_symbols.entry(file_key.clone()).or_default();
+                symbol_ids.reserve(entities.len() + 1);
+                symbol_ids.push(module_hash);
+                registry.entries.reserve(entities.len());
+                all_entities.reserve(entities.len());
 
                 for entity in entities {
                     let symbol_id = entity.symbol_id();
@@ -275,15 +450,20 @@ pub fn build_reference_graph(
 
                     let node_idx = graph.add_node(hash);
                     id_to_node.insert(hash, node_idx);
-
-                    file_symbols
-                        .entry(entity.file_path.clone())
-                        .or_default()
-                        .push(hash);
+                    symbol_ids.push(hash);
 
                     all_entities.push(entity);
                     stats.symbol_count += 1;
                 }
+
+                if !imports.is_empty() {
+                    py_links.push(PyLinks {
+                        source_canonical: canonical,
+                        file_key,
+                        imports,
+                        calls,
+                    });
+                }
             }
             Err(_) => {
                 stats.parse_errors += 1;
@@ -291,63 +471,49 @@ pub fn build_reference_graph(
         }
     }
 
-    // Build lookup: file_path -> [(name, id)]
-    let mut file_to_names: HashMap<String, Vec<(String, u64)>> = HashMap::new();
+    // Build lookup: file_path -> [(name, id)], borrowing strings from the registry
+    // (no per-symbol clones; the registry is not mutated again until Pass 1b).
+    // The same walk groups byte spans per file for caller containment lookup, so
+    // Pass 2 does not re-filter the whole registry for every source file.
+    let mut file_to_names: HashMap<&str, Vec<(&str, u64)>> = HashMap::new();
+    let mut file_to_spans: HashMap<&str, Vec<(u64, u32, u32)>> = HashMap::new();
     for entry in &registry.entries {
         file_to_names
-            .entry(entry.file_path.clone())
+            .entry(entry.file_path.as_str())
+            .or_default()
+            .push((entry.name.as_str(), entry.id));
+        file_to_spans
+            .entry(entry.file_path.as_str())
             .or_default()
-            .push((entry.name.clone(), entry.id));
+            .push((entry.id, entry.start_byte, entry.end_byte));
     }
 
-    // PASS 2: Link imports via call sites (symbol-to-symbol edges)
-    let mut parser = Parser::new();
-    parser
-        .set_language(&tree_sitter_python::LANGUAGE.into())
-        .map_err(|e| AnatomistError::ParseFailure(format!("Language load failed: {:?}", e)))?;
-
-    for source_path in &py_files {
-        let file = match File::open(source_path) {
-            Ok(f) => f,
-            Err(_) => continue,
-        };
-        let mmap = match unsafe { Mmap::map(&file) } {
-            Ok(m) => m,
-            Err(_) => continue,
-        };
-        let source = &mmap[..];
-
-        let tree = match parser.parse(source, None) {
-            Some(t) => t,
-            None => continue,
-        };
-
-        let imports = match extract_imports(source, tree.root_node()) {
-            Ok(imp) => imp,
-            Err(_) => continue,
-        };
-
-        let source_canonical = match dunce::canonicalize(source_path) {
-            Ok(p) => p,
-            Err(_) => continue,
-        };
-        let source_file_key = normalize_path(&source_canonical);
+    // Directory listings shared by Python import (Pass 2) and C++ include (Pass 2b)
+    // resolution, so each directory is read once rather than stat-ed per candidate.
+    let mut dirs = DirCache::new();
 
+    // PASS 2: Link imports via call sites (symbol-to-symbol edges)
+    for links in &py_links {
         // Build import_targets: name -> [target_symbol_id]
-        let mut import_targets: HashMap<String, Vec<u64>> = HashMap::new();
-        for import in &imports {
-            let target_path = match resolve_import(&source_canonical, &import.raw_path, &root) {
+        let mut import_targets: HashMap<&str, Vec<u64>> = HashMap::new();
+        for import in &links.imports {
+            let target_path = match resolve_import_cached(
+                &links.source_canonical,
+                &import.raw_path,
+                &root,
+                &mut dirs,
+            ) {
                 Some(p) => p,
                 None => continue,
             };
             let target_file_key = normalize_path(&target_path);
-            let target_names = match file_to_names.get(&target_file_key) {
+            let target_names = match file_to_names.get(target_file_key.as_str()) {
                 Some(names) => names,
                 None => continue,
             };
-            for (name, id) in target_names {
-                if import.names.is_empty() || import.names.contains(name) {
-                    import_targets.entry(name.clone()).or_default().push(*id);
+            for &(name, id) in target_names {
+                if import.names.is_empty() || import.names.iter().any(|n| n == name) {
+                    import_targets.entry(name).or_default().push(id);
                 }
             }
         }
@@ -356,22 +522,18 @@ pub fn build_reference_graph(
             continue;
         }
 
-        // Build source_entries: (symbol_id, start_byte, end_byte) for containment lookup
-        let source_entries: Vec<(u64, u32, u32)> = registry
-            .entries
-            .iter()
-            .filter(|e| e.file_path == source_file_key)
-            .map(|e| (e.id, e.start_byte, e.end_byte))
-            .collect();
+        // source_entries: (symbol_id, start_byte, end_byte) for containment lookup
+        let source_entries = file_to_spans
+            .get(links.file_key.as_str())
+            .map_or(&[][..], Vec::as_slice);
 
-        // Extract call sites and emit directed edges
-        let calls = extract_calls(source, tree.root_node());
-        for call in calls {
-            let target_ids = match import_targets.get(&call.name) {
+        // Emit directed edges for call sites collected in Pass 1
+        for call in &links.calls {
+            let target_ids = match import_targets.get(call.name.as_str()) {
                 Some(ids) => ids,
                 None => continue,
             };
-            let caller_id = match find_containing_entity(call.byte_offset, &source_entries) {
+            let caller_id = match find_containing_entity(call.byte_offset, source_entries) {
                 Some(id) => id,
                 None => continue,
             };
@@ -388,7 +550,9 @@ pub fn build_reference_graph(
         }
     }
 
-    // PASS 1b: Index C++ symbols
+    // PASS 1b: Index C++ symbols and collect #include directives from the same mmap
+    let mut cpp_file_keys: HashSet<String> = HashSet::new();
+    let mut cpp_links: Vec<CppLinks> = Vec::new();
     for path in &cpp_files {
         let file = match File::open(path) {
             Ok(f) => f,
@@ -399,10 +563,26 @@ pub fn build_reference_graph(
             Err(_) => continue,
         };
         let source = &mmap[..];
-        let canonical = dunce::canonicalize(path).unwrap_or_else(|_| path.to_path_buf());
+        let (canonical, is_canonical) = match dunce::canonicalize(path) {
+            Ok(p) => (p, true),
+            Err(_) => (path.to_path_buf(), false),
+        };
         let file_key = normalize_path(&canonical);
         let file_size = source.len().min(u32::MAX as usize) as u32;
 
+        // Include edges are resolvable only from a canonical source location.
+        if is_canonical {
+            cpp_file_keys.insert(file_key.clone());
+            let includes = extract_cpp_includes(source);
+            if !includes.is_empty() {
+                cpp_links.push(CppLinks {
+                    source_canonical: canonical.clone(),
+                    file_key: file_key.clone(),
+                    includes,
+                });
+            }
+        }
+
         // __MODULE__ sentinel for file-level include edges
         let module_sym_id = format!("{}::__MODULE__", file_key);
         let module_hash = symbol_hash(&module_sym_id);
@@ -421,13 +601,15 @@ pub fn build_reference_graph(
         });
         let module_node = graph.add_node(module_hash);
         id_to_node.insert(module_hash, module_node);
-        file_symbols
-            .entry(file_key.clone())
-            .or_default()
-            .push(module_hash);
+        // Entities are extracted under `file_key`, so they share the module's list.
+        let symbol_ids = file_symbols.entry(file_key.clone()).or_default();
+        symbol_ids.push(module_hash);
 
         match ParserHost::extract_cpp_entities(source, &file_key) {
             Ok(entities) => {
+                symbol_ids.reserve(entities.len());
+                registry.entries.reserve(entities.len());
+                all_entities.reserve(entities.len());
                 for entity in entities {
                     let symbol_id = entity.symbol_id();
                     let hash = symbol_hash(&symbol_id);
@@ -449,10 +631,7 @@ pub fn build_reference_graph(
 
                     let node_idx = graph.add_node(hash);
                     id_to_node.insert(hash, node_idx);
-                    file_symbols
-                        .entry(entity.file_path.clone())
-                        .or_default()
-                        .push(hash);
+                    symbol_ids.push(hash);
 
                     all_entities.push(entity);
                     stats.symbol_count += 1;
@@ -464,49 +643,20 @@ pub fn build_reference_graph(
         }
     }
 
-    // Build C++ file-key index for include resolution
-    let cpp_file_keys: HashSet<String> = cpp_files
-        .iter()
-        .filter_map(|p| dunce::canonicalize(p).ok())
-        .map(|p| normalize_path(&p))
-        .collect();
-
     // PASS 2b: Wire #include edges as __MODULE__ → __MODULE__ file-level links
-    for source_path in &cpp_files {
-        let file = match File::open(source_path) {
-            Ok(f) => f,
-            Err(_) => continue,
-        };
-        let mmap = match unsafe { Mmap::map(&file) } {
-            Ok(m) => m,
-            Err(_) => continue,
-        };
-        let source = &mmap[..];
-        let includes = extract_cpp_includes(source);
-        if includes.is_empty() {
-            continue;
-        }
-
-        let source_canonical = match dunce::canonicalize(source_path) {
-            Ok(p) => p,
-            Err(_) => continue,
-        };
-        let source_file_key = normalize_path(&source_canonical);
-        let src_module_id = symbol_hash(&format!("{}::__MODULE__", source_file_key));
+    for links in &cpp_links {
+        let src_module_id = symbol_hash(&format!("{}::__MODULE__", links.file_key));
         let src_node = match id_to_node.get(&src_module_id) {
             Some(&n) => n,
             None => continue,
         };
-        let source_dir = source_canonical
-            .parent()
-            .unwrap_or(root.as_path())
-            .to_path_buf();
+        let source_dir = links.source_canonical.parent().unwrap_or(root.as_path());
 
-        for include in &includes {
+        for include in &links.includes {
             // Try relative-to-source-dir first, then relative-to-project-root
             let target_abs = [source_dir.join(&include.path), root.join(&include.path)]
                 .into_iter()
-                .find(|p| p.exists())
+                .find(|p| dirs.exists(p))
                 .and_then(|p| dunce::canonicalize(p).ok());
 
             let Some(target_abs) = target_abs else {
@@ -533,28 +683,14 @@ pub fn build_reference_graph(
     })
 }
 
-/// Walks a directory for `.py` files, skipping excluded directories.
-fn walk_py_files(root: &Path) -> Result<Vec<PathBuf>, AnatomistError> {
-    let mut files = Vec::new();
-
-    for entry in WalkDir::new(root)
-        .into_iter()
-        .filter_entry(|e| !is_excluded(e.path()))
-    {
-        let entry = entry.map_err(|e| AnatomistError::IoError(e.into()))?;
-        let path = entry.path();
-        if path.is_file() && path.extension().and_then(|s| s.to_str()) == Some("py") {
-            files.push(path.to_path_buf());
-        }
-    }
-
-    Ok(files)
-}
-
-/// Walks a directory for C++ source files (`.cpp`, `.cxx`, `.cc`, `.h`, `.hpp`),
-/// skipping the same excluded directories as [`walk_py_files`].
-fn walk_cpp_files(root: &Path) -> Result<Vec<PathBuf>, AnatomistError> {
-    let mut files = Vec::new();
+/// Walks a directory once, collecting `.py` files and C++ source files
+/// (`.cpp`, `.cxx`, `.cc`, `.h`, `.hpp`) and pruning excluded directories.
+///
+/// The extension is checked before `is_file()`, so entries of any other type
+/// never cost an extra `stat`.
+fn walk_source_files(root: &Path) -> Result<(Vec<PathBuf>, Vec<PathBuf>), AnatomistError> {
+    let mut py_files = Vec::new();
+    let mut cpp_files = Vec::new();
 
     for entry in WalkDir::new(root)
         .into_iter()
@@ -562,35 +698,24 @@ fn walk_cpp_files(root: &Path) -> Result<Vec<PathBuf>, AnatomistError> {
     {
         let entry = entry.map_err(|e| AnatomistError::IoError(e.into()))?;
         let path = entry.path();
+        let files = match path.extension().and_then(|s| s.to_str()) {
+            Some("py") => &mut py_files,
+            Some("cpp" | "cxx" | "cc" | "h" | "hpp") => &mut cpp_files,
+            _ => continue,
+        };
         if path.is_file() {
-            if let Some("cpp" | "cxx" | "cc" | "h" | "hpp") =
-                path.extension().and_then(|s| s.to_str())
-            {
-                files.push(path.to_path_buf());
-            }
+            files.push(path.to_path_buf());
         }
     }
 
-    Ok(files)
+    Ok((py_files, cpp_files))
 }
 
 /// Returns `true` if the path should be excluded from walking.
 fn is_excluded(path: &Path) -> bool {
-    if let Some(name) = path.file_name().and_then(|s| s.to_str()) {
-        matches!(
-            name,
-            "__pycache__"
-                | ".git"
-                | ".janitor"
-                | "venv"
-                | ".venv"
-                | "target"
-                | "node_modules"
-                | ".pytest_cache"
-        )
-    } else {
-        false
-    }
+    path.file_name()
+        .and_then(|s| s.to_str())
+        .is_some_and(path_util::is_excluded_dir_name)
 }
 
 /// Normalizes a path for use as a HashMap key.
@@ -853,4 +978,56 @@ mod tests {
 
         fs::remove_dir_all(tmp).ok();
     }
+
+    #[test]
+    fn test_extract_links_single_pass() {
+        let source =
+            b"import os\nfrom pkg import helper\n\ndef main():\n    helper()\n    os.path.join()\n";
+        let mut parser = tree_sitter::Parser::new();
+        parser
+            .set_language(&tree_sitter_python::LANGUAGE.into())
+            .unwrap();
+        let tree = parser.parse(source, None).unwrap();
+
+        let (imports, calls) = extract_links(source, tree.root_node());
+        let paths: Vec<&str> = imports.iter().map(|i| i.raw_path.as_str()).collect();
+        assert_eq!(paths, vec!["os", "pkg"]);
+        assert_eq!(imports[1].names, vec!["helper"]);
+
+        let names: Vec<&str> = calls.iter().map(|c| c.name.as_str()).collect();
+        assert!(names.contains(&"helper"));
+        assert!(names.contains(&"join"));
+    }
+
+    #[test]
+    fn test_extract_links_drops_calls_without_imports() {
+        let source = b"def main():\n    helper()\n";
+        let mut parser = tree_sitter::Parser::new();
+        parser
+            .set_language(&tree_sitter_python::LANGUAGE.into())
+            .unwrap();
+        let tree = parser.parse(source, None).unwrap();
+
+        let (imports, calls) = extract_links(source, tree.root_node());
+        assert!(imports.is_empty());
+        assert!(calls.is_empty());
+    }
+
+    #[test]
+    fn test_walk_source_files_prunes_excluded() {
+        let tmp = std::env::temp_dir().join("test_graph_walk");
+        fs::remove_dir_all(&tmp).ok();
+        fs::create_dir_all(tmp.join("pkg")).ok();
+        fs::create_dir_all(tmp.join("node_modules").join("dep")).ok();
+        fs::write(tmp.join("pkg").join("a.py"), "").ok();
+        fs::write(tmp.join("pkg").join("b.hpp"), "").ok();
+        fs::write(tmp.join("pkg").join("notes.txt"), "").ok();
+        fs::write(tmp.join("node_modules").join("dep").join("c.py"), "").ok();
+
+        let (py_files, cpp_files) = walk_source_files(&tmp).unwrap();
+        assert_eq!(py_files, vec![tmp.join("pkg").join("a.py")]);
+        assert_eq!(cpp_files, vec![tmp.join("pkg").join("b.hpp")]);
+
+        fs::remove_dir_all(tmp).ok();
+    }
 }
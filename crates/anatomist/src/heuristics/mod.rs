@@ -18,7 +18,9 @@ use crate::Protection;
 /// - The first heuristic to return `Some(Protection)` wins
 /// - Implementations should be fast — they run for every entity in every file
 /// - Use byte-scanning where possible to avoid additional tree-sitter queries
-pub trait Heuristic {
+/// - Must be `Send + Sync`: the reference graph shares one `ParserHost` across
+///   its Pass 1 worker threads
+pub trait Heuristic: Send + Sync {
     /// Analyzes a tree-sitter node to determine if it should be protected.
     ///
     /// # Parameters
@@ -4,9 +4,11 @@
 //! Supports both absolute (`import foo.bar`) and relative (`from ..utils import x`) imports.
 
 use crate::AnatomistError;
+use std::collections::{HashMap, HashSet};
+use std::ffi::OsString;
 use std::path::{Path, PathBuf};
 use std::sync::OnceLock;
-use tree_sitter::{Node, Query, QueryCursor, StreamingIterator};
+use tree_sitter::{Node, Query, QueryCursor, QueryMatch, StreamingIterator};
 
 /// Import statement metadata extracted from Python source.
 #[derive(Debug, Clone, PartialEq, Eq)]
@@ -28,6 +30,31 @@ pub struct CppInclude {
     pub line: u32,
 }
 
+/// Tree-sitter patterns for Python import statements.
+///
+/// Shared with the reference graph, which appends its call-site patterns to run
+/// imports and calls through a single query cursor pass.
+pub(crate) const IMPORT_PATTERNS: &str = r#"
+    (import_statement
+      name: (dotted_name) @import_module)
+
+    (import_from_statement
+      module_name: (dotted_name) @from_module
+      name: (dotted_name) @from_name)
+
+    (import_from_statement
+      module_name: (relative_import) @from_relative
+      name: (dotted_name) @from_name_rel)
+
+    (import_from_statement
+      module_name: (dotted_name) @from_module_star
+      (wildcard_import))
+
+    (import_from_statement
+      module_name: (relative_import) @from_relative_star
+      (wildcard_import))
+"#;
+
 static IMPORT_QUERY: OnceLock<Query> = OnceLock::new();
 
 /// Extracts import statements from Python source code.
@@ -43,89 +70,85 @@ static IMPORT_QUERY: OnceLock<Query> = OnceLock::new();
 /// ```
 pub fn extract_imports(source: &[u8], root: Node) -> Result<Vec<ImportInfo>, AnatomistError> {
     let query = IMPORT_QUERY.get_or_init(|| {
-        Query::new(
-            &tree_sitter_python::LANGUAGE.into(),
-            r#"
-            (import_statement
-              name: (dotted_name) @import_module)
-
-            (import_from_statement
-              module_name: (dotted_name) @from_module
-              name: (dotted_name) @from_name)
-
-            (import_from_statement
-              module_name: (relative_import) @from_relative
-              name: (dotted_name) @from_name_rel)
-
-            (import_from_statement
-              module_name: (dotted_name) @from_module_star
-              (wildcard_import))
-
-            (import_from_statement
-              module_name: (relative_import) @from_relative_star
-              (wildcard_import))
-            "#,
-        )
-        .expect("Invalid import query")
+        Query::new(&tree_sitter_python::LANGUAGE.into(), IMPORT_PATTERNS)
+            .expect("Invalid import query")
     });
 
     let mut cursor = QueryCursor::new();
     let mut matches = cursor.matches(query, root, source);
 
     let mut imports = Vec::new();
-
     while let Some(m) = matches.next() {
-        let mut raw_path = String::new();
-        let mut names = Vec::new();
-        let mut line = 0;
+        imports.extend(import_from_match(query, m, source));
+    }
 
-        for capture in m.captures {
-            let node = capture.node;
-            let text = node.utf8_text(source).unwrap_or("");
-            let capture_name = query.capture_names()[capture.index as usize];
+    // Fallback: manual walking if query fails to capture
+    if imports.is_empty() {
+        imports = extract_imports_fallback(source, root);
+    }
 
-            match capture_name {
-                "import_module" => {
-                    raw_path = text.to_string();
-                    line = node.start_position().row as u32 + 1;
-                }
-                "from_module" | "from_module_star" => {
-                    raw_path = text.to_string();
-                    line = node.start_position().row as u32 + 1;
-                }
-                "from_relative" | "from_relative_star" => {
-                    raw_path = text.to_string();
-                    line = node.start_position().row as u32 + 1;
-                }
-                "from_name" | "from_name_rel" => {
-                    names.push(text.to_string());
-                }
-                _ => {}
+    Ok(imports)
+}
+
+/// Builds an [`ImportInfo`] from one match of [`IMPORT_PATTERNS`].
+///
+/// `query` may contain additional patterns; only the import capture names are read.
+pub(crate) fn import_from_match(
+    query: &Query,
+    m: &QueryMatch<'_, '_>,
+    source: &[u8],
+) -> Option<ImportInfo> {
+    let mut raw_path = String::new();
+    let mut names = Vec::new();
+    let mut line = 0;
+
+    for capture in m.captures {
+        let node = capture.node;
+        let text = node.utf8_text(source).unwrap_or("");
+        let capture_name = query.capture_names()[capture.index as usize];
+
+        match capture_name {
+            "import_module" => {
+                raw_path = text.to_string();
+                line = node.start_position().row as u32 + 1;
+            }
+            "from_module" | "from_module_star" => {
+                raw_path = text.to_string();
+                line = node.start_position().row as u32 + 1;
             }
+            "from_relative" | "from_relative_star" => {
+                raw_path = text.to_string();
+                line = node.start_position().row as u32 + 1;
+            }
+            "from_name" | "from_name_rel" => {
+                names.push(text.to_string());
+            }
+            _ => {}
         }
+    }
 
-        if !raw_path.is_empty() {
-            imports.push(ImportInfo {
-                raw_path,
-                names,
-                line,
-            });
-        }
+    if raw_path.is_empty() {
+        return None;
     }
+    Some(ImportInfo {
+        raw_path,
+        names,
+        line,
+    })
+}
 
-    // Fallback: manual walking if query fails to capture
-    if imports.is_empty() {
-        let mut cursor_walk = root.walk();
-        for child in root.children(&mut cursor_walk) {
-            if child.kind() == "import_statement" || child.kind() == "import_from_statement" {
-                if let Some(info) = extract_import_manual(source, child) {
-                    imports.push(info);
-                }
+/// Walks top-level statements by hand, for trees the import query fails to capture.
+pub(crate) fn extract_imports_fallback(source: &[u8], root: Node) -> Vec<ImportInfo> {
+    let mut imports = Vec::new();
+    let mut cursor_walk = root.walk();
+    for child in root.children(&mut cursor_walk) {
+        if child.kind() == "import_statement" || child.kind() == "import_from_statement" {
+            if let Some(info) = extract_import_manual(source, child) {
+                imports.push(info);
             }
         }
     }
-
-    Ok(imports)
+    imports
 }
 
 /// Manual fallback for import extraction when query doesn't match.
@@ -195,26 +218,43 @@ pub fn resolve_import(
     source_file: &Path,
     import_path: &str,
     project_root: &Path,
+) -> Option<PathBuf> {
+    resolve_import_with(source_file, import_path, project_root, &mut |p| p.exists())
+}
+
+/// Same as [`resolve_import`], but answers existence probes from a shared [`DirCache`].
+///
+/// Use this when resolving many imports across a project: each package directory is
+/// listed once instead of being `stat`-ed for every `.py` / `__init__.py` candidate.
+pub fn resolve_import_cached(
+    source_file: &Path,
+    import_path: &str,
+    project_root: &Path,
+    dirs: &mut DirCache,
+) -> Option<PathBuf> {
+    resolve_import_with(source_file, import_path, project_root, &mut |p| {
+        dirs.exists(p)
+    })
+}
+
+fn resolve_import_with(
+    source_file: &Path,
+    import_path: &str,
+    project_root: &Path,
+    exists: &mut dyn FnMut(&Path) -> bool,
 ) -> Option<PathBuf> {
     // Count leading dots for relative imports
-    let dot_count = import_path.chars().take_while(|&c| c == '.').count();
+    let dotted = import_path.trim_start_matches('.');
+    let dot_count = import_path.len() - dotted.len();
 
     if dot_count > 0 {
-        // Relative import
-        let dotted = &import_path[dot_count..];
-        let base = if dot_count == 1 {
-            source_file.parent()?
-        } else {
-            let mut base = source_file.parent()?;
-            for _ in 0..(dot_count - 1) {
-                base = base.parent()?;
-            }
-            base
-        };
-        resolve_module_path(base, dotted)
+        // Relative import: one dot is the source file's directory, each
+        // additional dot climbs one more level.
+        let base = source_file.ancestors().nth(dot_count)?;
+        resolve_module_path(base, dotted, exists)
     } else {
         // Absolute import from project root
-        resolve_module_path(project_root, import_path)
+        resolve_module_path(project_root, import_path, exists)
     }
 }
 
@@ -223,34 +263,110 @@ pub fn resolve_import(
 /// Tries:
 /// 1. `{base}/{parts.join("/")}.py`
 /// 2. `{base}/{parts.join("/")}/__init__.py`
-fn resolve_module_path(base: &Path, dotted: &str) -> Option<PathBuf> {
+fn resolve_module_path(
+    base: &Path,
+    dotted: &str,
+    exists: &mut dyn FnMut(&Path) -> bool,
+) -> Option<PathBuf> {
     if dotted.is_empty() {
         // Special case: "from . import foo" resolves to current dir's __init__.py
         let init_py = base.join("__init__.py");
-        if init_py.exists() {
+        if exists(&init_py) {
             return dunce::canonicalize(init_py).ok();
         }
         return None;
     }
 
-    let parts: Vec<&str> = dotted.split('.').collect();
-    let rel_path = parts.join("/");
+    let module_dir = base.join(dotted.replace('.', "/"));
 
     // Try module.py
-    let module_py = base.join(format!("{}.py", rel_path));
-    if module_py.exists() {
+    let module_py = module_dir.with_extension("py");
+    if exists(&module_py) {
         return dunce::canonicalize(module_py).ok();
     }
 
     // Try module/__init__.py
-    let init_py = base.join(&rel_path).join("__init__.py");
-    if init_py.exists() {
+    let init_py = module_dir.join("__init__.py");
+    if exists(&init_py) {
         return dunce::canonicalize(init_py).ok();
     }
 
     None
 }
 
+/// Memoized directory listings for import and include resolution.
+///
+/// Resolving a Python import probes up to two candidates (`mod.py`, `mod/__init__.py`)
+/// and a C++ include up to two more (source-relative, root-relative); across a project
+/// the same package directories are probed over and over. `DirCache` reads each
+/// directory once and answers later probes in it from memory where the listing is
+/// authoritative (see [`DirCache::exists`]).
+///
+/// Listings are taken at first probe and never refreshed, so a cache should live no
+/// longer than a single graph build.
+#[derive(Debug, Default)]
+pub struct DirCache {
+    listings: HashMap<PathBuf, Listing>,
+}
+
+/// Cached state of one directory.
+#[derive(Debug)]
+enum Listing {
+    /// The directory does not exist, so nothing inside it does either.
+    Missing,
+    /// Exact entry names.
+    Names(HashSet<OsString>),
+    /// The directory could not be read (e.g. permissions); probes go to the filesystem.
+    Unreadable,
+}
+
+/// Whether a name absent from an exact listing is known not to exist.
+///
+/// Listings hold exact, case-sensitive names. The default filesystems on Windows and
+/// macOS are case-insensitive, so `Foo.h` can still name `foo.h` there and a miss must
+/// be confirmed with `Path::exists`.
+const LISTING_MISS_IS_AUTHORITATIVE: bool = !cfg!(any(windows, target_os = "macos"));
+
+impl DirCache {
+    pub fn new() -> Self {
+        Self::default()
+    }
+
+    /// Returns `true` if `path` names an existing file or directory.
+    ///
+    /// Hits, probes inside a missing directory, and (on case-sensitive platforms)
+    /// misses are answered from the cached listing. Misses on case-insensitive
+    /// platforms, unreadable directories, and paths without a final normal component
+    /// (e.g. ending in `..`) fall back to a direct filesystem check.
+    pub fn exists(&mut self, path: &Path) -> bool {
+        let (Some(dir), Some(name)) = (path.parent(), path.file_name()) else {
+            return path.exists();
+        };
+        // A relative single-component path (`x.py`) has an empty parent.
+        let dir = if dir.as_os_str().is_empty() {
+            Path::new(".")
+        } else {
+            dir
+        };
+        if !self.listings.contains_key(dir) {
+            let listing = match std::fs::read_dir(dir) {
+                Ok(rd) => {
+                    Listing::Names(rd.filter_map(|e| e.ok()).map(|e| e.file_name()).collect())
+                }
+                Err(e) if e.kind() == std::io::ErrorKind::NotFound => Listing::Missing,
+                Err(_) => Listing::Unreadable,
+            };
+            self.listings.insert(dir.to_path_buf(), listing);
+        }
+        match &self.listings[dir] {
+            Listing::Missing => false,
+            Listing::Names(names) if names.contains(name) => true,
+            Listing::Names(_) if LISTING_MISS_IS_AUTHORITATIVE => false,
+            Listing::Names(_) | Listing::Unreadable => path.exists(),
+        }
+    }
+}
+
 /// Extracts local `#include "..."` directives from C++ source bytes.
 ///
 /// Only captures double-quoted (local) includes. Angle-bracket system includes
@@ -458,4 +574,52 @@ mod tests {
         assert!(result.is_none());
         fs::remove_dir_all(tmp).ok();
     }
+
+    #[test]
+    fn test_resolve_cached_matches_uncached() {
+        let tmp = std::env::temp_dir().join("test_resolve_cached");
+        fs::create_dir_all(tmp.join("pkg/sub")).ok();
+        fs::write(tmp.join("pkg/__init__.py"), "").ok();
+        fs::write(tmp.join("pkg/sub/mod.py"), "").ok();
+
+        let source = tmp.join("pkg/sub/main.py");
+        let mut dirs = DirCache::new();
+        for import in ["pkg", "pkg.sub.mod", ".mod", "..", "missing"] {
+            assert_eq!(
+                resolve_import_cached(&source, import, &tmp, &mut dirs),
+                resolve_import(&source, import, &tmp),
+                "mismatch for {import:?}"
+            );
+        }
+        assert!(dirs.exists(&tmp.join("pkg/sub")));
+        assert!(!dirs.exists(&tmp.join("pkg/sub/other.py")));
+
+        fs::remove_dir_all(tmp).ok();
+    }
+
+    #[test]
+    fn test_dir_cache_relative_single_component() {
+        // `Path::new("Cargo.toml").parent()` is the empty path, which `read_dir`
+        // rejects; the probe must list the working directory instead.
+        let mut dirs = DirCache::new();
+        assert!(dirs.exists(Path::new("Cargo.toml")));
+        assert!(!dirs.exists(Path::new("no_such_file.py")));
+    }
+
+    #[test]
+    fn test_dir_cache_missing_directory() {
+        let tmp = std::env::temp_dir().join("test_dir_cache_missing");
+        fs::remove_dir_all(&tmp).ok();
+        fs::create_dir_all(&tmp).ok();
+
+        let mut dirs = DirCache::new();
+        assert!(!dirs.exists(&tmp.join("os/__init__.py")));
+        // Created after the first probe: the cached `Missing` state still answers.
+        fs::create_dir_all(tmp.join("os")).ok();
+        fs::write(tmp.join("os/__init__.py"), "").ok();
+        assert!(!dirs.exists(&tmp.join("os/__init__.py")));
+        assert!(DirCache::new().exists(&tmp.join("os/__init__.py")));
+
+        fs::remove_dir_all(tmp).ok();
+    }
 }
@@ -4,13 +4,14 @@
 //! which grammar is used. Python entities receive full heuristic classification; other
 //! languages receive name + location extraction only.
 
+use std::cell::RefCell;
 use std::collections::HashSet;
 use std::fs::File;
 use std::path::Path;
 use std::sync::OnceLock;
 
 use memmap2::MmapOptions;
-use tree_sitter::{Language, Parser, Query, QueryCursor, StreamingIterator};
+use tree_sitter::{Language, Parser, Query, QueryCursor, StreamingIterator, Tree};
 
 use crate::path_util::normalize_path;
 use crate::{AnatomistError, Entity, EntityType, Heuristic};
@@ -35,6 +36,12 @@ static TSX_QUERY: OnceLock<Query> = OnceLock::new();
 /// Static cache for the C++ entity extraction query.
 static CPP_QUERY: OnceLock<Query> = OnceLock::new();
 
+thread_local! {
+    /// Parser reused by every non-Python extraction on this thread. Only the grammar
+    /// is swapped per call, which is much cheaper than building a new parser.
+    static NAMED_PARSER: RefCell<Parser> = RefCell::new(Parser::new());
+}
+
 /// S-expression shared by JS, TS, and TSX grammars (all extend the JS grammar node shapes).
 const JS_ENTITY_S_EXPR: &str = r#"
     (function_declaration
@@ -188,6 +195,27 @@ fn get_entity_query() -> &'static Query {
     })
 }
 
+/// Creates a tree-sitter parser with the Python grammar loaded.
+///
+/// # Errors
+/// Returns `AnatomistError::ParseFailure` if the grammar fails to load.
+pub(crate) fn python_parser() -> Result<Parser, AnatomistError> {
+    let mut parser = Parser::new();
+    parser
+        .set_language(&tree_sitter_python::LANGUAGE.into())
+        .map_err(|e| {
+            AnatomistError::ParseFailure(format!("Failed to load Python grammar: {}", e))
+        })?;
+    Ok(parser)
+}
+
+/// Parses Python `source` into a CST.
+fn parse_python(parser: &mut Parser, source: &[u8]) -> Result<Tree, AnatomistError> {
+    parser
+        .parse(source, None)
+        .ok_or_else(|| AnatomistError::ParseFailure("Tree-sitter parse returned None".to_string()))
+}
+
 /// The main parser host for extracting entities from Python source files.
 ///
 /// # Architecture
@@ -220,15 +248,8 @@ impl ParserHost {
     /// Returns `AnatomistError::ParseFailure` if the tree-sitter parser
     /// fails to initialize with the Python language.
     pub fn new() -> Result<Self, AnatomistError> {
-        let mut parser = Parser::new();
-        parser
-            .set_language(&tree_sitter_python::LANGUAGE.into())
-            .map_err(|e| {
-                AnatomistError::ParseFailure(format!("Failed to load Python grammar: {}", e))
-            })?;
-
         Ok(Self {
-            parser,
+            parser: python_parser()?,
             heuristics: Vec::new(),
         })
     }
@@ -362,11 +383,51 @@ impl ParserHost {
         source: &[u8],
         file_path: &str,
     ) -> Result<Vec<Entity>, AnatomistError> {
-        // Parse source into CST
-        let tree = self.parser.parse(source, None).ok_or_else(|| {
-            AnatomistError::ParseFailure("Tree-sitter parse returned None".to_string())
-        })?;
+        self.dissect_python(source, file_path)
+            .map(|(entities, _)| entities)
+    }
 
+    /// Extracts Python entities from an in-memory buffer and returns the parsed tree
+    /// alongside them.
+    ///
+    /// Callers that need more than entities from the same file (e.g. the reference
+    /// graph's import and call-site scan) can query the returned tree instead of
+    /// parsing `source` a second time. `file_path` must already be normalized.
+    ///
+    /// # Errors
+    /// - `ParseFailure`: Tree-sitter parse returned `None` (severe syntax errors)
+    pub fn dissect_python(
+        &mut self,
+        source: &[u8],
+        file_path: &str,
+    ) -> Result<(Vec<Entity>, Tree), AnatomistError> {
+        let tree = parse_python(&mut self.parser, source)?;
+        let entities = self.python_entities(&tree, source, file_path)?;
+        Ok((entities, tree))
+    }
+
+    /// Same as [`dissect_python`](Self::dissect_python), but parses with a
+    /// caller-owned `parser` so `&self` can be shared by worker threads that
+    /// each hold their own parser (see [`python_parser`]).
+    pub(crate) fn dissect_python_with(
+        &self,
+        parser: &mut Parser,
+        source: &[u8],
+        file_path: &str,
+    ) -> Result<(Vec<Entity>, Tree), AnatomistError> {
+        let tree = parse_python(parser, source)?;
+        let entities = self.python_entities(&tree, source, file_path)?;
+        Ok((entities, tree))
+    }
+
+    /// Extracts Python entities from an already-parsed tree, applying the
+    /// registered heuristics.
+    fn python_entities(
+        &self,
+        tree: &Tree,
+        source: &[u8],
+        file_path: &str,
+    ) -> Result<Vec<Entity>, AnatomistError> {
         let root = tree.root_node();
         let query = get_entity_query();
 
@@ -640,7 +701,8 @@ impl ParserHost {
 /// Parses `source` with `language`, runs `query`, and maps pattern indices to entity
 /// metadata via `patterns: &[(def_cap, name_cap, entity_type)]`.
 ///
-/// Creates a local `Parser` per call — avoids mutating the host's Python parser state.
+/// Uses a thread-local `Parser` separate from the host's Python parser, so the host's
+/// state is never mutated and no parser is allocated per file.
 fn extract_named_entities(
     source: &[u8],
     language: Language,
@@ -648,37 +710,51 @@ fn extract_named_entities(
     file_path: &str,
     patterns: &[(&str, &str, EntityType)],
 ) -> Result<Vec<Entity>, AnatomistError> {
-    let mut parser = Parser::new();
-    parser
-        .set_language(&language)
-        .map_err(|e| AnatomistError::ParseFailure(format!("Grammar load failed: {e}")))?;
-
-    let tree = parser
-        .parse(source, None)
-        .ok_or_else(|| AnatomistError::ParseFailure("Parse returned None".to_string()))?;
+    let tree = NAMED_PARSER.with_borrow_mut(|parser| {
+        parser
+            .set_language(&language)
+            .map_err(|e| AnatomistError::ParseFailure(format!("Grammar load failed: {e}")))?;
+        parser
+            .parse(source, None)
+            .ok_or_else(|| AnatomistError::ParseFailure("Parse returned None".to_string()))
+    })?;
+
+    // Resolve capture names to indices once so each match compares integers
+    // instead of capture-name strings.
+    let pattern_captures: Vec<(Option<u32>, Option<u32>, EntityType)> = patterns
+        .iter()
+        .map(|&(def_cap_name, name_cap_name, entity_type)| {
+            (
+                query.capture_index_for_name(def_cap_name),
+                query.capture_index_for_name(name_cap_name),
+                entity_type,
+            )
+        })
+        .collect();
 
     let root = tree.root_node();
-    let capture_names = query.capture_names();
     let mut cursor = QueryCursor::new();
     let mut matches = cursor.matches(query, root, source);
     let mut entities = Vec::new();
 
     while let Some(m) = matches.next() {
         let idx = m.pattern_index;
-        if idx >= patterns.len() {
+        if idx >= pattern_captures.len() {
             continue;
         }
-        let (def_cap_name, name_cap_name, entity_type) = patterns[idx];
+        let (Some(def_cap), Some(name_cap), entity_type) = pattern_captures[idx] else {
+            continue;
+        };
 
         let def_node = m
             .captures
             .iter()
-            .find(|c| capture_names[c.index as usize] == def_cap_name)
+            .find(|c| c.index == def_cap)
             .map(|c| c.node);
         let name_node = m
             .captures
             .iter()
-            .find(|c| capture_names[c.index as usize] == name_cap_name)
+            .find(|c| c.index == name_cap)
             .map(|c| c.node);
 
         let (Some(def_node), Some(name_node)) = (def_node, name_node) else {
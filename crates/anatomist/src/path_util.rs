@@ -25,13 +25,43 @@ use crate::AnatomistError;
 /// // On Unix: "/home/name/project/src/main.rs"
 /// ```
 pub fn normalize_path(path: &Path) -> Result<String, AnatomistError> {
-    let canonical = dunce::canonicalize(path)?;
+    canonical_key(&dunce::canonicalize(path)?)
+}
+
+/// Converts an already-canonicalized path to its forward-slash UTF-8 key.
+///
+/// Callers that need both the canonical `PathBuf` and its key canonicalize once
+/// and call this, instead of paying for a second `canonicalize` syscall via
+/// [`normalize_path`].
+///
+/// # Errors
+/// - Returns `AnatomistError::ParseFailure` if the path contains non-UTF-8 characters
+pub fn canonical_key(canonical: &Path) -> Result<String, AnatomistError> {
     let s = canonical.to_str().ok_or_else(|| {
         AnatomistError::ParseFailure(format!("Non-UTF-8 path: {}", canonical.display()))
     })?;
     Ok(s.replace('\\', "/"))
 }
 
+/// Returns `true` for directory names that every project walk prunes
+/// (VCS metadata, virtualenvs, build output, caches).
+///
+/// Checked against the single path component being entered, so pruning costs
+/// one `match` per directory rather than a scan of the full path.
+pub fn is_excluded_dir_name(name: &str) -> bool {
+    matches!(
+        name,
+        "__pycache__"
+            | ".git"
+            | ".janitor"
+            | "venv"
+            | ".venv"
+            | "target"
+            | "node_modules"
+            | ".pytest_cache"
+    )
+}
+
 #[cfg(test)]
 mod tests {
     use super::*;
@@ -60,4 +90,17 @@ mod tests {
         let result = normalize_path(Path::new("/this/does/not/exist/nowhere.py"));
         assert!(result.is_err());
     }
+
+    #[test]
+    fn test_canonical_key_matches_normalize_path() {
+        let cargo_manifest = std::env::var("CARGO_MANIFEST_DIR")
+            .map(|dir| Path::new(&dir).join("Cargo.toml"))
+            .unwrap();
+        let canonical = dunce::canonicalize(&cargo_manifest).unwrap();
+
+        assert_eq!(
+            canonical_key(&canonical).unwrap(),
+            normalize_path(&cargo_manifest).unwrap()
+        );
+    }
 }
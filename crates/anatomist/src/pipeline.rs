@@ -3,7 +3,7 @@
 //! Stages:
 //! - **Stage 0** — Directory filter: skip files in protected directories.
 //! - **Stage 1** — Reference graph: symbols with incoming edges survive.
-//! - **Stage 2+4** — Wisdom + PackageExport: single mmap pass per file via [`wisdom`].
+//! - **Stage 2+4** — Wisdom + PackageExport: each file is read once via [`wisdom`].
 //! - **Stage 3** — Library mode: protect public symbols when `--library` is set.
 //! - **Stage 5** — Grep shield: Aho-Corasick scan of non-`.py` files via [`scan`].
 //!
@@ -35,22 +35,27 @@ pub struct ScanResult {
     pub orphan_files: Vec<String>,
 }
 
-/// Directory name segments that indicate protected/test/example code (Stage 0).
-const PROTECTED_DIRS: &[&str] = &[
-    "tests",
-    "test",
-    "examples",
-    "example",
-    "docs_src",
-    "docs",
-    "sandbox",
-    "bin",
-    "scripts",
-    "tutorial",
-    "benchmarks",
-    "fixtures",
-    "migrations",
-];
+/// Returns `true` for directory name segments that indicate
+/// protected/test/example code (Stage 0).
+#[inline]
+fn is_protected_dir(seg: &str) -> bool {
+    matches!(
+        seg,
+        "tests"
+            | "test"
+            | "examples"
+            | "example"
+            | "docs_src"
+            | "docs"
+            | "sandbox"
+            | "bin"
+            | "scripts"
+            | "tutorial"
+            | "benchmarks"
+            | "fixtures"
+            | "migrations"
+    )
+}
 
 /// Runs the full 6-stage dead symbol detection pipeline against a project directory.
 ///
@@ -86,6 +91,7 @@ pub fn run(
     };
 
     // Stage 1 prep: collect symbol hashes with at least one incoming edge.
+    // Stops at the first incoming edge rather than counting them all.
     let referenced_ids: HashSet<u64> = ref_graph
         .graph
         .node_indices()
@@ -93,8 +99,8 @@ pub fn run(
             ref_graph
                 .graph
                 .edges_directed(n, Direction::Incoming)
-                .count()
-                > 0
+                .next()
+                .is_some()
         })
         .filter_map(|n| ref_graph.graph.node_weight(n))
         .copied()
@@ -147,7 +153,7 @@ pub fn run(
             continue;
         }
 
-        // Stage 2+4: Wisdom + PackageExport (single mmap pass per file).
+        // Stage 2+4: Wisdom + PackageExport (each file is read once).
         match std::fs::read(&file_path) {
             Ok(source) => {
                 wisdom::classify(&mut still_dead, &source, &file_path);
@@ -180,7 +186,9 @@ pub fn run(
     // Stage 4.5: Bridge Shield — protect Python route handlers referenced by JS/TS API paths.
     // Extracts path strings (e.g. "/users") from JS/TS files and cross-references them
     // against each candidate entity's decorator text.
-    let bridge_paths = scan::bridge_extract(&root).unwrap_or_default();
+    // One walk gathers the non-Python files for both this stage and Stage 5.
+    let scan_files = scan::collect_scan_files(&root);
+    let bridge_paths = scan::bridge_extract_files(&scan_files).unwrap_or_default();
     if !bridge_paths.is_empty() {
         let mut remaining: Vec<Entity> = Vec::new();
         for mut entity in candidates {
@@ -206,7 +214,7 @@ pub fn run(
 
     // Stage 5: Grep Shield — only for symbols still dead after stages 0-4.5.
     let dead_names: Vec<String> = candidates.iter().map(|e| e.name.clone()).collect();
-    let grep_found = scan::grep_shield(&dead_names, &root)?;
+    let grep_found = scan::grep_shield_files(&dead_names, &scan_files)?;
 
     for mut entity in candidates {
         if grep_found.contains(&entity.name) {
@@ -246,9 +254,7 @@ pub fn run(
 
 /// Returns `true` if any path segment matches a protected directory name.
 fn is_protected_path(file_path: &str) -> bool {
-    file_path
-        .split('/')
-        .any(|seg| PROTECTED_DIRS.contains(&seg))
+    file_path.split('/').any(is_protected_dir)
 }
 
 #[cfg(test)]
@@ -7,23 +7,56 @@
 //! **Memory model**: one mmap per file, zero heap allocation per match.
 //! **Time complexity**: O(patterns·len + file_sizes) — single pass per file.
 
+use crate::path_util;
 use aho_corasick::{AhoCorasick, MatchKind};
 use memmap2::Mmap;
 use std::collections::HashSet;
 use std::fs::File;
-use std::path::Path;
+use std::path::{Path, PathBuf};
 use walkdir::WalkDir;
 
-/// File extensions to scan for string references to Python symbols.
+/// Returns `true` for file extensions scanned for string references to Python symbols.
 ///
 /// Excludes `.py` files — those are already covered by the reference graph.
-const GREP_EXTENSIONS: &[&str] = &[
-    // Web
-    "html", "htm", "css", "scss", "js", "jsx", "ts", "tsx", "vue", "svelte", // Config
-    "xml", "yaml", "yml", "toml", "json", "ini", "cfg", "env", "conf", // Templates
-    "jinja", "j2", "mako", // Docs / Scripts
-    "md", "rst", "txt", "sh", "bash",
-];
+/// A single `match` rather than a linear scan of an extension list.
+fn is_grep_extension(ext: &str) -> bool {
+    matches!(
+        ext,
+        // Web
+        "html" | "htm" | "css" | "scss" | "js" | "jsx" | "ts" | "tsx" | "vue" | "svelte"
+        // Config
+        | "xml" | "yaml" | "yml" | "toml" | "json" | "ini" | "cfg" | "env" | "conf"
+        // Templates
+        | "jinja" | "j2" | "mako"
+        // Docs / Scripts
+        | "md" | "rst" | "txt" | "sh" | "bash"
+    )
+}
+
+/// Collects every file the grep and bridge shields scan, in one pruned walk.
+///
+/// The pipeline walks once and hands the list to [`bridge_extract_files`] and
+/// [`grep_shield_files`], rather than each stage walking the tree again.
+/// Unreadable directory entries are skipped.
+pub fn collect_scan_files(project_root: &Path) -> Vec<PathBuf> {
+    let mut files = Vec::new();
+    for entry in WalkDir::new(project_root)
+        .into_iter()
+        .filter_entry(|e| !is_scan_excluded(e.path()))
+        .flatten()
+    {
+        let path = entry.path();
+        // Extension first: non-matching entries never cost an `is_file()` stat.
+        let ext = path
+            .extension()
+            .and_then(|s| s.to_str())
+            .unwrap_or_default();
+        if is_grep_extension(ext) && path.is_file() {
+            files.push(path.to_path_buf());
+        }
+    }
+    files
+}
 
 /// Scans non-Python project files for occurrences of the given symbol names.
 ///
@@ -40,6 +73,20 @@ pub fn grep_shield(dead_names: &[String], project_root: &Path) -> anyhow::Result
     if dead_names.is_empty() {
         return Ok(HashSet::new());
     }
+    grep_shield_files(dead_names, &collect_scan_files(project_root))
+}
+
+/// [`grep_shield`] over a file list already gathered by [`collect_scan_files`].
+///
+/// # Errors
+/// Same as [`grep_shield`].
+pub fn grep_shield_files(
+    dead_names: &[String],
+    files: &[PathBuf],
+) -> anyhow::Result<HashSet<String>> {
+    if dead_names.is_empty() {
+        return Ok(HashSet::new());
+    }
 
     // Build automaton once — O(sum of name lengths).
     let ac = AhoCorasick::builder()
@@ -49,24 +96,7 @@ pub fn grep_shield(dead_names: &[String], project_root: &Path) -> anyhow::Result
 
     let mut found: HashSet<String> = HashSet::new();
 
-    for entry in WalkDir::new(project_root)
-        .into_iter()
-        .filter_entry(|e| !is_scan_excluded(e.path()))
-        .flatten()
-    {
-        let path = entry.path();
-        if !path.is_file() {
-            continue;
-        }
-
-        let ext = path
-            .extension()
-            .and_then(|s| s.to_str())
-            .unwrap_or_default();
-        if !GREP_EXTENSIONS.contains(&ext) {
-            continue;
-        }
-
+    for path in files {
         let file = match File::open(path) {
             Ok(f) => f,
             Err(_) => continue,
@@ -103,17 +133,19 @@ pub fn grep_shield(dead_names: &[String], project_root: &Path) -> anyhow::Result
 /// # Errors
 /// Individual file I/O errors are silently skipped.
 pub fn bridge_extract(project_root: &Path) -> anyhow::Result<HashSet<String>> {
+    bridge_extract_files(&collect_scan_files(project_root))
+}
+
+/// [`bridge_extract`] over a file list already gathered by [`collect_scan_files`].
+///
+/// Files other than `.js`, `.jsx`, `.ts`, and `.tsx` are ignored.
+///
+/// # Errors
+/// Same as [`bridge_extract`].
+pub fn bridge_extract_files(files: &[PathBuf]) -> anyhow::Result<HashSet<String>> {
     let mut api_paths: HashSet<String> = HashSet::new();
 
-    for entry in WalkDir::new(project_root)
-        .into_iter()
-        .filter_entry(|e| !is_scan_excluded(e.path()))
-        .flatten()
-    {
-        let path = entry.path();
-        if !path.is_file() {
-            continue;
-        }
+    for path in files {
         let ext = path
             .extension()
             .and_then(|s| s.to_str())
@@ -172,20 +204,7 @@ pub fn bridge_extract(project_root: &Path) -> anyhow::Result<HashSet<String>> {
 fn is_scan_excluded(path: &Path) -> bool {
     path.file_name()
         .and_then(|s| s.to_str())
-        .map(|name| {
-            matches!(
-                name,
-                "__pycache__"
-                    | ".git"
-                    | ".janitor"
-                    | "venv"
-                    | ".venv"
-                    | "target"
-                    | "node_modules"
-                    | ".pytest_cache"
-            )
-        })
-        .unwrap_or(false)
+        .is_some_and(path_util::is_excluded_dir_name)
 }
 
 #[cfg(test)]
@@ -279,4 +298,27 @@ mod tests {
         assert!(paths.is_empty());
         fs::remove_dir_all(tmp).ok();
     }
+
+    #[test]
+    fn test_collect_scan_files_shared_by_both_shields() {
+        let tmp = std::env::temp_dir().join("test_scan_shared_walk");
+        fs::remove_dir_all(&tmp).ok();
+        fs::create_dir_all(tmp.join("node_modules")).ok();
+
+        fs::write(tmp.join("api.ts"), b"fetch('/orders'); handle_order();").ok();
+        fs::write(tmp.join("main.py"), b"def handle_order(): pass").ok();
+        fs::write(tmp.join("node_modules").join("lib.js"), b"'/vendored'").ok();
+
+        let files = collect_scan_files(&tmp);
+        assert_eq!(files, vec![tmp.join("api.ts")]);
+
+        let paths = bridge_extract_files(&files).unwrap();
+        assert!(paths.contains("/orders"));
+        assert!(!paths.contains("/vendored"));
+
+        let found = grep_shield_files(&["handle_order".to_string()], &files).unwrap();
+        assert!(found.contains("handle_order"));
+
+        fs::remove_dir_all(tmp).ok();
+    }
 }
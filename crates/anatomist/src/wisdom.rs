@@ -6,11 +6,16 @@
 //! **Stage 2**: WisdomRegistry heuristics — decorators, names, framework patterns.
 //! **Stage 4**: Package export detection — `__all__` and `__init__.py` top-level symbols.
 //!
-//! Both stages share pre-computed file-level flags (one linear pass each),
-//! then iterate entities once. Total cost: O(file_size + entity_count).
+//! Both stages share file-level flags (one linear pass each, computed lazily on
+//! first use), then iterate entities once. Total cost: O(file_size + entity_count),
+//! and files whose entities are all settled by name/decorator checks skip the
+//! file-level scans entirely.
 
 use crate::{Entity, Protection};
+use aho_corasick::AhoCorasick;
+use std::cell::OnceCell;
 use std::collections::HashSet;
+use std::sync::OnceLock;
 
 // --- Directory-level protection ---
 
@@ -21,7 +26,7 @@ use std::collections::HashSet;
 /// treated as entry points.
 ///
 /// `migrations/` is intentionally omitted here — it is already caught by Stage 0
-/// (`PROTECTED_DIRS` in `pipeline.rs`) which marks the entire directory as `Directory`.
+/// (`is_protected_dir` in `pipeline.rs`) which marks the entire directory as `Directory`.
 static PLUGIN_DIRS: &[&str] = &["spiders", "plugins", "commands", "handlers", "tasks"];
 
 // --- Byte pattern tables (compile-time constants) ---
@@ -56,6 +61,12 @@ static CLI_DEC: &[&[u8]] = &[
     b"typer.command",
 ];
 
+/// SQLAlchemy import markers (file-level scan).
+static SQLALCHEMY_MARKERS: &[&[u8]] = &[b"sqlalchemy", b"SQLAlchemy"];
+
+/// Qt widget base class markers (file-level scan).
+static QT_MARKERS: &[&[u8]] = &[b"QWidget", b"QMainWindow", b"QObject"];
+
 /// ORM base class patterns (file-level: indicates ORM usage).
 static ORM_BASE: &[&[u8]] = &[b"(Model)", b"(Base)", b"(Document)", b"(db.Model)"];
 
@@ -108,6 +119,53 @@ static METAPROG: &[&[u8]] = &[
     b"type(",
 ];
 
+// --- Compiled automata (one accessor per multi-pattern table) ---
+//
+// Each accessor owns its cache, so a table can only ever be matched by its own
+// automaton. Every automaton is one Aho-Corasick pass over the haystack
+// regardless of the number of patterns, built on first use.
+
+/// Builds the automaton for a static pattern table.
+fn build_ac(patterns: &[&[u8]]) -> AhoCorasick {
+    AhoCorasick::new(patterns).expect("static wisdom patterns are valid")
+}
+
+/// Automaton for [`DI_PATTERNS`].
+fn di_ac() -> &'static AhoCorasick {
+    static AC: OnceLock<AhoCorasick> = OnceLock::new();
+    AC.get_or_init(|| build_ac(DI_PATTERNS))
+}
+
+/// Automaton for [`ORM_BASE`].
+fn orm_base_ac() -> &'static AhoCorasick {
+    static AC: OnceLock<AhoCorasick> = OnceLock::new();
+    AC.get_or_init(|| build_ac(ORM_BASE))
+}
+
+/// Automaton for [`SQLALCHEMY_MARKERS`].
+fn sqlalchemy_markers_ac() -> &'static AhoCorasick {
+    static AC: OnceLock<AhoCorasick> = OnceLock::new();
+    AC.get_or_init(|| build_ac(SQLALCHEMY_MARKERS))
+}
+
+/// Automaton for [`SQLALCHEMY_DEC`].
+fn sqlalchemy_dec_ac() -> &'static AhoCorasick {
+    static AC: OnceLock<AhoCorasick> = OnceLock::new();
+    AC.get_or_init(|| build_ac(SQLALCHEMY_DEC))
+}
+
+/// Automaton for [`QT_MARKERS`].
+fn qt_markers_ac() -> &'static AhoCorasick {
+    static AC: OnceLock<AhoCorasick> = OnceLock::new();
+    AC.get_or_init(|| build_ac(QT_MARKERS))
+}
+
+/// Automaton for [`METAPROG`].
+fn metaprog_ac() -> &'static AhoCorasick {
+    static AC: OnceLock<AhoCorasick> = OnceLock::new();
+    AC.get_or_init(|| build_ac(METAPROG))
+}
+
 // ---------------------------------------------------------------------------
 
 /// Classifies entities in-place using Stages 2 and 4 of the pipeline.
@@ -120,24 +178,22 @@ static METAPROG: &[&[u8]] = &[
 /// - `source`: Raw bytes of that file (used for byte-level pattern scanning).
 /// - `file_path`: Normalized file path (UTF-8, forward slashes).
 pub fn classify(entities: &mut [Entity], source: &[u8], file_path: &str) {
-    // Pre-compute file-level flags — one linear scan each, amortised over all entities.
-    let has_di = any_in(source, DI_PATTERNS);
-    let has_orm = any_in(source, ORM_BASE);
-    let has_sqlalchemy =
-        bytes_contain(source, b"sqlalchemy") || bytes_contain(source, b"SQLAlchemy");
-    let has_qt = bytes_contain(source, b"QWidget")
-        || bytes_contain(source, b"QMainWindow")
-        || bytes_contain(source, b"QObject");
-    let has_metaprog = any_in(source, METAPROG);
+    // File-level flags — one linear scan each, computed on first use and amortised
+    // over all entities. Cheap name/decorator checks below run first, so files whose
+    // entities are all settled by them never pay for the scans.
+    let has_di = OnceCell::new();
+    let has_orm = OnceCell::new();
+    let has_sqlalchemy = OnceCell::new();
+    let has_qt = OnceCell::new();
+    let has_metaprog = OnceCell::new();
     let is_init = file_path.ends_with("__init__.py");
 
     // Plugin directory flag: file lives in a framework-managed directory.
-    let is_plugin_dir = PLUGIN_DIRS
-        .iter()
-        .any(|d| file_path.split('/').any(|seg| seg == *d));
+    // One split of the path, each segment checked against the table.
+    let is_plugin_dir = file_path.split('/').any(|seg| PLUGIN_DIRS.contains(&seg));
 
     // Stage 4: extract __all__ exports (single scan, result is &str slices into `source`).
-    let all_exports = extract_all_exports(source);
+    let all_exports = OnceCell::new();
 
     for entity in entities.iter_mut() {
         // Already protected by a prior pass (e.g., PytestFixture from parser).
@@ -197,42 +253,43 @@ pub fn classify(entities: &mut [Entity], source: &[u8], file_path: &str) {
         }
 
         // 2f. SQLAlchemy decorator on this entity.
-        if has_sqlalchemy {
+        if *has_sqlalchemy.get_or_init(|| sqlalchemy_markers_ac().is_match(source)) {
             let es = entity_src(source, entity);
-            if any_in(es, SQLALCHEMY_DEC) {
+            if sqlalchemy_dec_ac().is_match(es) {
                 entity.protected_by = Some(Protection::SqlAlchemyMeta);
                 continue;
             }
         }
 
         // 2g. ORM lifecycle method (method inside a class, file uses ORM bases).
-        if has_orm
-            && entity.parent_class.is_some()
+        if entity.parent_class.is_some()
             && ORM_LIFECYCLE_NAMES.contains(&entity.name.as_str())
+            && *has_orm.get_or_init(|| orm_base_ac().is_match(source))
         {
             entity.protected_by = Some(Protection::OrmLifecycle);
             continue;
         }
 
         // 2h. FastAPI dependency injection in entity body.
-        if has_di {
+        if *has_di.get_or_init(|| di_ac().is_match(source)) {
             let es = entity_src(source, entity);
-            if any_in(es, DI_PATTERNS) {
+            if di_ac().is_match(es) {
                 entity.protected_by = Some(Protection::FastApiOverride);
                 continue;
             }
         }
 
         // 2i. Qt auto-connection slot: `on_<widget>_<signal>` in Qt-using file.
-        if has_qt && is_qt_auto_slot(&entity.name) {
+        if is_qt_auto_slot(&entity.name) && *has_qt.get_or_init(|| qt_markers_ac().is_match(source))
+        {
             entity.protected_by = Some(Protection::QtAutoSlot);
             continue;
         }
 
         // 2j. General metaprogramming in this entity's body.
-        if has_metaprog {
+        if *has_metaprog.get_or_init(|| metaprog_ac().is_match(source)) {
             let es = entity_src(source, entity);
-            if any_in(es, METAPROG) {
+            if metaprog_ac().is_match(es) {
                 entity.protected_by = Some(Protection::MetaprogrammingDanger);
                 continue;
             }
@@ -241,7 +298,10 @@ pub fn classify(entities: &mut [Entity], source: &[u8], file_path: &str) {
         // --- Stage 4: Package Export ---
 
         // 4a. Symbol name appears in `__all__`.
-        if !all_exports.is_empty() && all_exports.contains(entity.name.as_str()) {
+        if all_exports
+            .get_or_init(|| extract_all_exports(source))
+            .contains(entity.name.as_str())
+        {
             entity.protected_by = Some(Protection::PackageExport);
             continue;
         }
@@ -274,15 +334,10 @@ fn entity_src<'a>(source: &'a [u8], entity: &Entity) -> &'a [u8] {
     }
 }
 
-/// Returns true if any pattern in `patterns` is found in `haystack`.
-fn any_in(haystack: &[u8], patterns: &[&[u8]]) -> bool {
-    patterns.iter().any(|p| bytes_contain(haystack, p))
-}
-
 /// Returns true if `needle` is a substring of `haystack` (naive O(n·m) scan).
 ///
-/// Fast enough for decorator regions (<512 bytes) and entity-body checks.
-/// For large file-level scans, call once per flag and cache the result.
+/// Fast enough for decorator regions (<512 bytes). Multi-pattern scans over
+/// file or entity bodies go through the compiled automata instead.
 fn bytes_contain(haystack: &[u8], needle: &[u8]) -> bool {
     if needle.len() > haystack.len() {
         return false;
@@ -448,6 +503,27 @@ mod tests {
         assert_eq!(entities[0].protected_by, Some(Protection::QtAutoSlot));
     }
 
+    #[test]
+    fn test_orm_lifecycle_requires_orm_base() {
+        let source = b"class User(Model):\n    def save(self): pass";
+        let mut entities = vec![
+            make_entity("save", vec![], Some("User".into())),
+            make_entity("save", vec![], None),
+        ];
+        classify(&mut entities, source, "src/models.py");
+        assert_eq!(entities[0].protected_by, Some(Protection::OrmLifecycle));
+        // Top-level `save` is not a lifecycle hook.
+        assert_eq!(entities[1].protected_by, None);
+
+        let mut plain = vec![make_entity("save", vec![], Some("User".into()))];
+        classify(
+            &mut plain,
+            b"class User:\n    def save(self): pass",
+            "src/models.py",
+        );
+        assert_eq!(plain[0].protected_by, None);
+    }
+
     #[test]
     fn test_extract_all_single_quotes() {
         let source = b"__all__ = ('alpha', 'beta')";
@@ -1,6 +1,6 @@
 use clap::{Parser, Subcommand};
-use std::collections::HashMap;
-use std::env;
+use std::collections::{BTreeMap, HashMap};
+use std::io::{BufWriter, Write};
 use std::path::{Path, PathBuf};
 
 #[derive(Parser)]
@@ -64,13 +64,11 @@ enum ShadowCmd {
     },
 }
 
-#[tokio::main]
-async fn main() -> anyhow::Result<()> {
+fn main() -> anyhow::Result<()> {
     if let Err(e) = dotenvy::dotenv() {
         eprintln!("warning: .env: {}", e);
     }
 
-    let _root = env::current_dir().unwrap_or_else(|_| PathBuf::from("."));
     let cli = Cli::parse();
 
     match &cli.command {
@@ -112,59 +110,74 @@ fn cmd_scan(project_root: &Path, library: bool, verbose: bool) -> anyhow::Result
     println!("| Orphan files   : {:>22} |", result.orphan_files.len());
     println!("+------------------------------------------+");
 
+    // Per-symbol listings can run to thousands of lines: write them through one
+    // locked, buffered handle instead of locking stdout on every `println!`.
+    let mut out = BufWriter::new(std::io::stdout().lock());
     if result.dead.is_empty() {
-        println!("No dead symbols detected.");
+        writeln!(out, "No dead symbols detected.")?;
     } else {
-        println!("\nDEAD SYMBOLS:");
+        writeln!(out, "\nDEAD SYMBOLS:")?;
         for entity in &result.dead {
-            println!(
+            writeln!(
+                out,
                 "  {}:{} - {}",
                 entity.file_path, entity.start_line, entity.qualified_name
-            );
+            )?;
         }
     }
 
-    println!("\n+------------------------------------------+");
-    println!("| DEAD FILES (ORPHANS)                     |");
-    println!("+------------------------------------------+");
-    println!("| Count          : {:>22} |", result.orphan_files.len());
-    println!("+------------------------------------------+");
+    writeln!(out, "\n+------------------------------------------+")?;
+    writeln!(out, "| DEAD FILES (ORPHANS)                     |")?;
+    writeln!(out, "+------------------------------------------+")?;
+    writeln!(
+        out,
+        "| Count          : {:>22} |",
+        result.orphan_files.len()
+    )?;
+    writeln!(out, "+------------------------------------------+")?;
     if result.orphan_files.is_empty() {
-        println!("No orphan files detected.");
+        writeln!(out, "No orphan files detected.")?;
     } else {
         for path in &result.orphan_files {
-            println!("  {path}");
+            writeln!(out, "  {path}")?;
         }
     }
 
     if verbose {
-        println!("\nPROTECTED SYMBOLS:");
+        writeln!(out, "\nPROTECTED SYMBOLS:")?;
         for entity in &result.protected {
-            println!(
+            writeln!(
+                out,
                 "  {}:{} - {} [{:?}]",
                 entity.file_path, entity.start_line, entity.qualified_name, entity.protected_by
-            );
+            )?;
         }
     }
+    out.flush()?;
+    drop(out);
 
     // Persist the full registry to .janitor/symbols.rkyv for the dashboard.
     let rkyv_path = project_root.join(".janitor").join("symbols.rkyv");
     let mut registry = SymbolRegistry::new();
-    for entity in result.dead.iter().chain(result.protected.iter()) {
-        registry.insert(SymbolEntry {
-            id: symbol_hash(&entity.symbol_id()),
-            name: entity.name.clone(),
-            qualified_name: entity.qualified_name.clone(),
-            file_path: entity.file_path.clone(),
-            entity_type: entity.entity_type as u8,
-            start_line: entity.start_line,
-            end_line: entity.end_line,
-            start_byte: entity.start_byte,
-            end_byte: entity.end_byte,
-            structural_hash: entity.structural_hash.unwrap_or(0),
-            protected_by: entity.protected_by,
-        });
-    }
+    registry.extend(
+        result
+            .dead
+            .iter()
+            .chain(result.protected.iter())
+            .map(|entity| SymbolEntry {
+                id: symbol_hash(&entity.symbol_id()),
+                name: entity.name.clone(),
+                qualified_name: entity.qualified_name.clone(),
+                file_path: entity.file_path.clone(),
+                entity_type: entity.entity_type as u8,
+                start_line: entity.start_line,
+                end_line: entity.end_line,
+                start_byte: entity.start_byte,
+                end_byte: entity.end_byte,
+                structural_hash: entity.structural_hash.unwrap_or(0),
+                protected_by: entity.protected_by,
+            }),
+    );
     if let Err(e) = registry.save(&rkyv_path) {
         eprintln!("warning: could not save symbols.rkyv: {}", e);
     }
@@ -183,8 +196,6 @@ struct DupGroup {
 }
 
 fn cmd_dedup(path: &Path, apply: bool, token: Option<&str>) -> anyhow::Result<()> {
-    use anatomist::{heuristics::pytest::PytestFixtureHeuristic, parser::ParserHost};
-
     if apply {
         require_token(token)?;
     }
@@ -195,14 +206,91 @@ fn cmd_dedup(path: &Path, apply: bool, token: Option<&str>) -> anyhow::Result<()
         return Ok(());
     }
 
+    // Files never share a group, so they are split across scoped worker threads.
+    // Each worker owns its ParserHost: a tree-sitter Parser cannot be shared.
+    let workers = std::thread::available_parallelism()
+        .map_or(1, |n| n.get())
+        .min(py_files.len());
+    let chunk_size = py_files.len().div_ceil(workers);
+    let mut all_groups: Vec<DupGroup> = Vec::new();
+    std::thread::scope(|scope| -> anyhow::Result<()> {
+        let handles: Vec<_> = py_files
+            .chunks(chunk_size)
+            .map(|chunk| scope.spawn(move || dedup_groups(chunk)))
+            .collect();
+        // Joined in spawn order so group output follows file order.
+        for handle in handles {
+            let groups = handle
+                .join()
+                .unwrap_or_else(|e| std::panic::resume_unwind(e))?;
+            all_groups.extend(groups);
+        }
+        Ok(())
+    })?;
+
+    if all_groups.is_empty() {
+        println!("No duplicate functions found.");
+        return Ok(());
+    }
+
+    println!("+------------------------------------------+");
+    println!("| JANITOR DEDUP                            |");
+    println!("+------------------------------------------+");
+    println!("| Duplicate groups : {:>20} |", all_groups.len());
+    println!("+------------------------------------------+");
+
+    for group in &all_groups {
+        println!("\n  Hash: {:016x}", group.hash);
+        for entity in &group.members {
+            println!(
+                "    {}:{} - {}",
+                entity.file_path, entity.start_line, entity.qualified_name
+            );
+        }
+    }
+
+    if apply {
+        apply_dedup(&all_groups, path)?;
+    }
+
+    Ok(())
+}
+
+/// Parses `files` with a dedicated `ParserHost` and returns their duplicate groups.
+fn dedup_groups(files: &[PathBuf]) -> anyhow::Result<Vec<DupGroup>> {
+    use anatomist::{heuristics::pytest::PytestFixtureHeuristic, parser::ParserHost};
+
     let mut host = ParserHost::new()?;
     host.register_heuristic(Box::new(PytestFixtureHeuristic));
 
     let mut all_groups: Vec<DupGroup> = Vec::new();
 
-    for file_path in &py_files {
-        let entities = match host.dissect(file_path) {
-            Ok(e) => e,
+    for file_path in files {
+        let source = match std::fs::read(file_path) {
+            Ok(s) => s,
+            Err(e) => {
+                eprintln!("warning: skipping {}: {}", file_path.display(), e);
+                continue;
+            }
+        };
+        // Tree-sitter byte offsets are u32; `dissect` rejects larger files the same way.
+        if source.len() > u32::MAX as usize {
+            eprintln!(
+                "warning: skipping {}: {}",
+                file_path.display(),
+                anatomist::AnatomistError::ByteRangeOverflow
+            );
+            continue;
+        }
+        // Groups never span files, so a file with fewer than two `def`s cannot
+        // contain a duplicate; skip the parse and hash walk entirely.
+        if !has_two_defs(&source) {
+            continue;
+        }
+        let entities = match anatomist::path_util::normalize_path(file_path)
+            .and_then(|file_key| host.dissect_python(&source, &file_key))
+        {
+            Ok((e, _)) => e,
             Err(e) => {
                 eprintln!("warning: skipping {}: {}", file_path.display(), e);
                 continue;
@@ -227,32 +315,19 @@ fn cmd_dedup(path: &Path, apply: bool, token: Option<&str>) -> anyhow::Result<()
         }
     }
 
-    if all_groups.is_empty() {
-        println!("No duplicate functions found.");
-        return Ok(());
-    }
-
-    println!("+------------------------------------------+");
-    println!("| JANITOR DEDUP                            |");
-    println!("+------------------------------------------+");
-    println!("| Duplicate groups : {:>20} |", all_groups.len());
-    println!("+------------------------------------------+");
-
-    for group in &all_groups {
-        println!("\n  Hash: {:016x}", group.hash);
-        for entity in &group.members {
-            println!(
-                "    {}:{} - {}",
-                entity.file_path, entity.start_line, entity.qualified_name
-            );
-        }
-    }
-
-    if apply {
-        apply_dedup(&all_groups, path)?;
-    }
+    Ok(all_groups)
+}
 
-    Ok(())
+/// Returns `true` if `source` contains at least two `def` keywords.
+///
+/// A byte scan, so `def` inside strings and comments also counts — a false
+/// positive only costs the parse the caller would have done anyway.
+fn has_two_defs(source: &[u8]) -> bool {
+    source
+        .windows(4)
+        .filter(|w| w[..3] == *b"def" && (w[3] == b' ' || w[3] == b'\t'))
+        .nth(1)
+        .is_some()
 }
 
 fn apply_dedup(groups: &[DupGroup], root_hint: &Path) -> anyhow::Result<()> {
@@ -265,15 +340,20 @@ fn apply_dedup(groups: &[DupGroup], root_hint: &Path) -> anyhow::Result<()> {
     };
 
     let mut by_file: HashMap<&Path, (Vec<ReplacementTarget>, Vec<String>)> = HashMap::new();
+    // Source bytes per file, read once and shared by every group in that file.
+    let mut sources: HashMap<&Path, Vec<u8>> = HashMap::new();
 
     for group in groups {
         let file_path = group.file_path.as_path();
-        let source = std::fs::read(file_path)?;
+        if !sources.contains_key(file_path) {
+            sources.insert(file_path, std::fs::read(file_path)?);
+        }
+        let source = &sources[file_path];
 
         let canon = &group.members[0];
         let impl_name = format!("_{}_impl", canon.name);
 
-        let (body_start, params_str) = extract_function_parts(&source, canon)?;
+        let (body_start, params_str) = extract_function_parts(source, canon)?;
         let original_body =
             std::str::from_utf8(&source[body_start as usize..canon.end_byte as usize])
                 .unwrap_or("    pass\n");
@@ -289,8 +369,13 @@ fn apply_dedup(groups: &[DupGroup], root_hint: &Path) -> anyhow::Result<()> {
         let entry = by_file.entry(file_path).or_default();
         entry.1.push(impl_block);
 
-        for member in &group.members {
-            let (member_body_start, _) = extract_function_parts(&source, member)?;
+        for (i, member) in group.members.iter().enumerate() {
+            // members[0] is `canon`, whose body offset was already found above.
+            let member_body_start = if i == 0 {
+                body_start
+            } else {
+                extract_function_parts(source, member)?.0
+            };
             entry.0.push(ReplacementTarget {
                 qualified_name: member.qualified_name.clone(),
                 start_byte: member_body_start,
@@ -304,11 +389,12 @@ fn apply_dedup(groups: &[DupGroup], root_hint: &Path) -> anyhow::Result<()> {
         let mut deleter = SafeDeleter::new(&project_root)?;
         deleter.replace_symbols(file_path, &mut replacements)?;
 
-        let mut current = std::fs::read_to_string(file_path)?;
-        for block in &impl_blocks {
-            current.push_str(block);
-        }
-        std::fs::write(file_path, &current)?;
+        // Append the impl blocks in one write instead of reading the rewritten
+        // file back and writing it out again in full.
+        std::fs::OpenOptions::new()
+            .append(true)
+            .open(file_path)?
+            .write_all(impl_blocks.concat().as_bytes())?;
 
         match run_pytest(&project_root) {
             Ok(()) => {
@@ -373,20 +459,21 @@ fn cmd_clean(project_root: &Path, token: &str) -> anyhow::Result<()> {
         ShadowManager::initialize(project_root, &shadow_path)?
     };
 
-    // 3. Collect unique files and unmap their symlinks.
-    let mut dead_files: Vec<PathBuf> = result
-        .dead
-        .iter()
-        .map(|e| PathBuf::from(&e.file_path))
-        .collect();
-    dead_files.sort();
-    dead_files.dedup();
+    // 3. Group dead symbols by file once; the keys drive unmapping here and
+    //    the same table drives physical deletion in step 5. A BTreeMap keeps
+    //    both in sorted path order, as the old sort + dedup did.
+    let mut by_file: BTreeMap<&str, Vec<&anatomist::Entity>> = BTreeMap::new();
+    for entity in &result.dead {
+        by_file
+            .entry(entity.file_path.as_str())
+            .or_default()
+            .push(entity);
+    }
 
     let mut unmapped: Vec<PathBuf> = Vec::new();
-    for abs in &dead_files {
-        let rel = abs
-            .strip_prefix(manager.source_root())
-            .unwrap_or(abs.as_path());
+    for file_str in by_file.keys() {
+        let abs = Path::new(file_str);
+        let rel = abs.strip_prefix(manager.source_root()).unwrap_or(abs);
         match manager.unmap(rel) {
             Ok(()) => unmapped.push(rel.to_path_buf()),
             Err(e) => eprintln!("warning: unmap {}: {}", abs.display(), e),
@@ -409,14 +496,6 @@ fn cmd_clean(project_root: &Path, token: &str) -> anyhow::Result<()> {
     }
 
     // 5. Physical deletion via SafeDeleter.
-    let mut by_file: HashMap<&str, Vec<&anatomist::Entity>> = HashMap::new();
-    for entity in &result.dead {
-        by_file
-            .entry(entity.file_path.as_str())
-            .or_default()
-            .push(entity);
-    }
-
     for (file_str, entities) in &by_file {
         let file_path = Path::new(file_str);
         let mut deleter = SafeDeleter::new(project_root)?;
@@ -541,28 +620,31 @@ fn params_to_call_args(params: &str) -> String {
     if params.trim().is_empty() {
         return String::new();
     }
-    let args: Vec<String> = params
-        .split(',')
-        .filter_map(|p| {
-            let p = p.trim();
-            if p.is_empty() {
-                return None;
-            }
-            let name_part = p
-                .split(':')
-                .next()
-                .unwrap_or(p)
-                .split('=')
-                .next()
-                .unwrap_or(p)
-                .trim();
-            if name_part.is_empty() {
-                return None;
-            }
-            Some(name_part.to_string())
-        })
-        .collect();
-    args.join(", ")
+    // Appends borrowed name slices straight into the output; no per-parameter
+    // String or intermediate Vec.
+    let mut args = String::with_capacity(params.len());
+    for p in params.split(',') {
+        let p = p.trim();
+        if p.is_empty() {
+            continue;
+        }
+        let name_part = p
+            .split(':')
+            .next()
+            .unwrap_or(p)
+            .split('=')
+            .next()
+            .unwrap_or(p)
+            .trim();
+        if name_part.is_empty() {
+            continue;
+        }
+        if !args.is_empty() {
+            args.push_str(", ");
+        }
+        args.push_str(name_part);
+    }
+    args
 }
 
 fn collect_py_files(path: &Path) -> anyhow::Result<Vec<PathBuf>> {
@@ -573,9 +655,16 @@ fn collect_py_files(path: &Path) -> anyhow::Result<Vec<PathBuf>> {
     let files = WalkDir::new(path)
         .follow_links(false)
         .into_iter()
+        .filter_entry(|e| {
+            e.depth() == 0
+                || !e
+                    .file_name()
+                    .to_str()
+                    .is_some_and(anatomist::path_util::is_excluded_dir_name)
+        })
         .filter_map(|e| e.ok())
         .filter(|e| {
-            e.file_type().is_file() && e.path().extension().and_then(|x| x.to_str()) == Some("py")
+            e.path().extension().and_then(|x| x.to_str()) == Some("py") && e.file_type().is_file()
         })
         .map(|e| e.path().to_path_buf())
         .collect();
@@ -601,3 +690,33 @@ fn run_pytest(dir: &Path) -> anyhow::Result<()> {
         )),
     }
 }
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    #[test]
+    fn test_has_two_defs_async() {
+        let src = b"async def a():\n    pass\n\nasync def b():\n    pass\n";
+        assert!(has_two_defs(src));
+    }
+
+    #[test]
+    fn test_has_two_defs_tab_after_def() {
+        let src = b"def\ta():\n    pass\n\ndef\tb():\n    pass\n";
+        assert!(has_two_defs(src));
+    }
+
+    #[test]
+    fn test_has_two_defs_single_def() {
+        let src = b"import os\n\ndef only():\n    return os.sep\n";
+        assert!(!has_two_defs(src));
+    }
+
+    #[test]
+    fn test_has_two_defs_counts_def_in_string() {
+        // A false positive only costs a parse; it must never hide a real pair.
+        let src = b"DOC = \"def inside a string\"\n\ndef real():\n    pass\n";
+        assert!(has_two_defs(src));
+    }
+}
@@ -6,6 +6,7 @@
 use crate::Protection;
 use memmap2::Mmap;
 use rkyv::bytecheck::CheckBytes;
+use rkyv::util::AlignedVec;
 use rkyv::{Archive, Deserialize, Serialize};
 use std::fs::File;
 use std::hash::{Hash, Hasher};
@@ -89,18 +90,31 @@ impl SymbolRegistry {
 
     /// Sorts entries by ID and serializes the registry to bytes using `rkyv`.
     pub fn to_bytes(&mut self) -> Result<Vec<u8>, RegistryError> {
+        Ok(self.to_aligned_bytes()?.to_vec())
+    }
+
+    /// Sorts entries by ID and serializes into rkyv's aligned buffer, without the
+    /// extra full-size copy `to_bytes` makes into a plain `Vec<u8>`.
+    fn to_aligned_bytes(&mut self) -> Result<AlignedVec, RegistryError> {
         self.entries.sort_by_key(|e| e.id);
-        let aligned = rkyv::to_bytes::<rkyv::rancor::Error>(self)
-            .map_err(|e| RegistryError::DeserializeError(e.to_string()))?;
-        Ok(aligned.to_vec())
+        rkyv::to_bytes::<rkyv::rancor::Error>(self)
+            .map_err(|e| RegistryError::DeserializeError(e.to_string()))
     }
 
     /// Saves the registry to a file (sorts by ID before writing).
+    ///
+    /// Skips the write when the file already holds identical bytes, so re-scanning an
+    /// unchanged project leaves the registry (and its mtime) untouched.
     pub fn save(&mut self, path: &Path) -> Result<(), RegistryError> {
         if let Some(parent) = path.parent() {
             std::fs::create_dir_all(parent)?;
         }
-        let bytes = self.to_bytes()?;
+        let bytes = self.to_aligned_bytes()?;
+        let unchanged = std::fs::metadata(path).is_ok_and(|m| m.len() == bytes.len() as u64)
+            && std::fs::read(path).is_ok_and(|existing| existing[..] == bytes[..]);
+        if unchanged {
+            return Ok(());
+        }
         let mut file = File::create(path)?;
         file.write_all(&bytes)?;
         Ok(())
@@ -113,6 +127,14 @@ impl Default for SymbolRegistry {
     }
 }
 
+/// Bulk insertion: reserves once from the iterator's size hint instead of growing
+/// the entry vector one `insert` at a time.
+impl Extend<SymbolEntry> for SymbolRegistry {
+    fn extend<I: IntoIterator<Item = SymbolEntry>>(&mut self, iter: I) {
+        self.entries.extend(iter);
+    }
+}
+
 /// Memory-mapped read-only registry handle.
 pub struct MappedRegistry {
     _mmap: Mmap,
@@ -225,6 +247,71 @@ mod tests {
         std::fs::remove_file(tmp_path).ok();
     }
 
+    #[test]
+    fn test_extend_bulk_insert() {
+        let mut registry = SymbolRegistry::new();
+        registry.extend((0..3u64).map(|id| SymbolEntry {
+            id,
+            name: format!("f{id}"),
+            qualified_name: format!("f{id}"),
+            file_path: "bulk.py".into(),
+            entity_type: 0,
+            start_line: 1,
+            end_line: 1,
+            start_byte: 0,
+            end_byte: 0,
+            structural_hash: 0,
+            protected_by: None,
+        }));
+        assert_eq!(registry.len(), 3);
+        assert_eq!(registry.entries[2].name, "f2");
+    }
+
+    #[test]
+    fn test_save_skips_identical_rewrite() {
+        let entry = SymbolEntry {
+            id: 7,
+            name: "baz".into(),
+            qualified_name: "baz".into(),
+            file_path: "baz.py".into(),
+            entity_type: 0,
+            start_line: 1,
+            end_line: 1,
+            start_byte: 0,
+            end_byte: 0,
+            structural_hash: 0,
+            protected_by: None,
+        };
+        let tmp_path = std::env::temp_dir().join("test_registry_skip.db");
+        std::fs::remove_file(&tmp_path).ok();
+
+        let mut registry = SymbolRegistry::new();
+        registry.insert(entry.clone());
+        registry.save(&tmp_path).unwrap();
+
+        // Backdate the file to a fixed mtime; any rewrite would move it to "now",
+        // which stays distinguishable even on filesystems with coarse timestamps.
+        let backdated = std::time::UNIX_EPOCH + std::time::Duration::from_secs(1_000_000);
+        std::fs::File::options()
+            .write(true)
+            .open(&tmp_path)
+            .unwrap()
+            .set_modified(backdated)
+            .unwrap();
+
+        // Same content: file must not be rewritten.
+        registry.save(&tmp_path).unwrap();
+        let after = std::fs::metadata(&tmp_path).unwrap().modified().unwrap();
+        assert_eq!(after, backdated);
+
+        // Changed content: file is rewritten.
+        registry.insert(SymbolEntry { id: 8, ..entry });
+        registry.save(&tmp_path).unwrap();
+        assert_eq!(MappedRegistry::open(&tmp_path).unwrap().len(), 2);
+
+        std::fs::remove_file(tmp_path).ok();
+    }
+
     #[test]
     fn test_empty_registry() {
         let registry = SymbolRegistry::new();
@@ -1,4 +1,4 @@
-use common::registry::SymbolRegistry;
+use common::registry::{SymbolEntry, SymbolRegistry};
 use crossterm::{
     event::{self, DisableMouseCapture, EnableMouseCapture, Event, KeyCode},
     execute,
@@ -47,14 +47,23 @@ fn run_app<B: ratatui::backend::Backend>(
 ) -> io::Result<()> {
     // Calculate stats once
     let total_symbols = registry.len() as u64;
-    let dead_candidates_iter = registry.entries.iter().filter(|e| e.protected_by.is_none());
-
-    let dead_count = dead_candidates_iter.clone().count() as u64;
-
-    let mut dead_entries: Vec<_> = dead_candidates_iter.collect();
-    // Sort by size (descending)
-    dead_entries.sort_by_key(|e| std::cmp::Reverse(e.end_byte.saturating_sub(e.start_byte)));
-    let top_10_dead: Vec<_> = dead_entries.iter().take(10).collect();
+    // Single pass over the registry: the dead count is the collected length.
+    let mut dead_entries: Vec<_> = registry
+        .entries
+        .iter()
+        .filter(|e| e.protected_by.is_none())
+        .collect();
+    let dead_count = dead_entries.len() as u64;
+
+    // Largest first. Partition out the top 10 in O(n), then sort only those.
+    let by_size_desc =
+        |e: &&SymbolEntry| std::cmp::Reverse(e.end_byte.saturating_sub(e.start_byte));
+    if dead_entries.len() > 10 {
+        dead_entries.select_nth_unstable_by_key(9, by_size_desc);
+        dead_entries.truncate(10);
+    }
+    dead_entries.sort_by_key(by_size_desc);
+    let top_10_dead = dead_entries;
 
     let density = if total_symbols > 0 {
         ((total_symbols - dead_count) as f64 / total_symbols as f64) * 100.0
@@ -23,18 +23,25 @@
 
 use tree_sitter::Node;
 
-/// Node kinds that carry only naming information and must be erased
-/// during alpha-normalization.
-const SKIP_KINDS: &[&str] = &[
-    "identifier",
-    "string",
-    "string_content",
-    "string_start",
-    "string_end",
-    "escape_sequence",
-    "comment",
-    "type_comment",
-];
+/// Returns `true` for node kinds that carry only naming information and must
+/// be erased during alpha-normalization.
+///
+/// Compiled to a single `match` on the kind string — checked once per node in
+/// the hash walk, so it must not scan a list.
+#[inline]
+fn is_skip_kind(kind: &str) -> bool {
+    matches!(
+        kind,
+        "identifier"
+            | "string"
+            | "string_content"
+            | "string_start"
+            | "string_end"
+            | "escape_sequence"
+            | "comment"
+            | "type_comment"
+    )
+}
 
 /// Computes a deterministic structural hash for the given AST node.
 ///
@@ -54,9 +61,9 @@ const SKIP_KINDS: &[&str] = &[
 /// shape and operator structure will produce identical values regardless of
 /// variable naming.
 pub fn compute_structural_hash(node: Node<'_>, source: &[u8]) -> u64 {
-    let mut hasher = blake3::Hasher::new();
-    hash_node_recursive(&mut hasher, node, source);
-    let digest = hasher.finalize();
+    let mut encoded = Vec::new();
+    encode_tree(&mut encoded, node, source);
+    let digest = blake3::hash(&encoded);
     u64::from_le_bytes(digest.as_bytes()[..8].try_into().expect("blake3 ≥ 8 bytes"))
 }
 
@@ -82,46 +89,61 @@ impl DuplicateGroup {
 }
 
 // ---------------------------------------------------------------------------
-// Internal recursive walker
+// Internal tree walker
 // ---------------------------------------------------------------------------
 
-/// Returns `true` if `node` (or any of its descendants) will contribute to the hash.
+/// Appends the structural encoding of the subtree rooted at `root` to `out`.
 ///
-/// A node contributes when it is NOT in `SKIP_KINDS` AND either:
+/// A node contributes when `is_skip_kind` is false for it AND either:
 /// - it is a leaf node, OR
 /// - at least one of its children contributes.
 ///
-/// This pre-check lets us skip container nodes whose entire subtree is
-/// alpha-normalized away — most importantly `expression_statement` nodes
-/// that wrap docstring literals at the top of a function body.
-fn has_structural_content(node: Node<'_>) -> bool {
-    if SKIP_KINDS.contains(&node.kind()) {
-        return false;
-    }
-    if node.child_count() == 0 {
-        return true; // Non-skipped leaf — contributes its kind_id.
-    }
-    let mut cursor = node.walk();
-    let result = node
-        .children(&mut cursor)
-        .any(|child| has_structural_content(child));
-    result
-}
-
-fn hash_node_recursive(hasher: &mut blake3::Hasher, node: Node<'_>, _source: &[u8]) {
-    // Skip nodes that are either alpha-normalized away or have no structural
-    // descendants (e.g., a docstring `expression_statement`).
-    if !has_structural_content(node) {
-        return;
-    }
-
-    // Hash the structural kind_id (u16 → 2 bytes).
-    hasher.update(&node.kind_id().to_le_bytes());
+/// Single fused pass: each node's `kind_id` is written speculatively before its
+/// children are visited, and rolled back if it turns out to be a container whose
+/// entire subtree was alpha-normalized away — most importantly
+/// `expression_statement` nodes that wrap docstring literals at the top of a
+/// function body.
+///
+/// Iterative depth-first pre-order walk over one `TreeCursor`: no recursion (deeply
+/// nested expressions cannot overflow the stack) and no per-node cursor allocation.
+/// `open` holds, for each container currently being visited, the buffer mark to
+/// roll back to and whether any child has contributed yet.
+fn encode_tree(out: &mut Vec<u8>, root: Node<'_>, _source: &[u8]) {
+    let mut cursor = root.walk();
+    let mut open: Vec<(usize, bool)> = Vec::new();
+
+    loop {
+        let node = cursor.node();
+        if !is_skip_kind(node.kind()) {
+            let mark = out.len();
+            // Hash the structural kind_id (u16 → 2 bytes).
+            out.extend_from_slice(&node.kind_id().to_le_bytes());
+            if cursor.goto_first_child() {
+                open.push((mark, false));
+                continue;
+            }
+            // Non-skipped leaf — contributes its kind_id.
+            if let Some(parent) = open.last_mut() {
+                parent.1 = true;
+            }
+        }
 
-    // Recurse into children (depth-first pre-order).
-    let mut cursor = node.walk();
-    for child in node.children(&mut cursor) {
-        hash_node_recursive(hasher, child, _source);
+        // Advance to the next sibling, closing finished containers on the way up.
+        loop {
+            if open.is_empty() {
+                return;
+            }
+            if cursor.goto_next_sibling() {
+                break;
+            }
+            cursor.goto_parent();
+            let (mark, contributed) = open.pop().expect("open is non-empty");
+            if !contributed {
+                out.truncate(mark);
+            } else if let Some(parent) = open.last_mut() {
+                parent.1 = true;
+            }
+        }
     }
 }
 
@@ -185,6 +207,29 @@ mod tests {
         assert_eq!(h1, h2, "Docstring should not affect structural hash");
     }
 
+    #[test]
+    fn test_nested_comment_ignored() {
+        let h1 = body_hash("def f(x):\n    if x:\n        return x\n    return 0\n");
+        let h2 = body_hash(
+            "def f(x):\n    if x:\n        # early exit\n        return x\n    return 0\n",
+        );
+        assert_eq!(
+            h1, h2,
+            "Comments inside nested blocks should not affect the hash"
+        );
+    }
+
+    #[test]
+    fn test_deep_nesting_does_not_overflow() {
+        let depth = 2_000;
+        let src = format!(
+            "def f(x):\n    return {}x{}\n",
+            "(".repeat(depth),
+            ")".repeat(depth)
+        );
+        assert_ne!(body_hash(&src), 0);
+    }
+
     #[test]
     fn test_determinism() {
         let h1 = body_hash("def foo(x):\n    return x * 2\n");
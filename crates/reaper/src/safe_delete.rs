@@ -3,10 +3,10 @@
 //! ## Workflow
 //! 1. `SafeDeleter::new(project_root)` — initialises the ghost directory.
 //! 2. `delete_symbols(file, targets)` — backs up the file on first touch,
-//!    then excises the listed byte ranges **bottom-to-top** (reverse start_byte order)
-//!    so that earlier offsets remain valid during the transaction.
+//!    then excises the listed byte ranges in a single forward pass that copies
+//!    only the surviving spans, so every offset refers to the original file.
 //! 3. `replace_symbols(file, targets)` — backs up the file on first touch,
-//!    then substitutes each byte range with replacement text, also bottom-to-top.
+//!    then substitutes each byte range with replacement text in the same kind of pass.
 //! 4. `commit()` — success path: removes backup files.
 //! 5. `restore_all()` — failure path: copies every backup back to its original path.
 
@@ -66,8 +66,9 @@ impl SafeDeleter {
 
     /// Backs up `file_path` (if not already done), then excises all listed byte ranges.
     ///
-    /// Targets are processed **bottom-to-top** (descending `start_byte`) so that
-    /// earlier offsets remain valid after each splice.
+    /// Targets are sorted by ascending `start_byte` and the output is rebuilt in
+    /// one pass from the surviving spans: O(n + k) rather than a tail memmove
+    /// per target. A target nested inside an earlier one is covered by it.
     ///
     /// Returns the number of symbols actually removed.
     pub fn delete_symbols(
@@ -81,11 +82,12 @@ impl SafeDeleter {
 
         self.ensure_backup(file_path)?;
 
-        let mut content = std::fs::read(file_path)?;
+        let content = std::fs::read(file_path)?;
 
-        // Sort DESCENDING — bottom-to-top so earlier offsets stay valid.
-        targets.sort_by(|a, b| b.start_byte.cmp(&a.start_byte));
+        targets.sort_by_key(|t| t.start_byte);
 
+        let mut out = Vec::with_capacity(content.len());
+        let mut cursor = 0usize;
         let mut removed = 0usize;
         for target in targets.iter() {
             let start = snap_char_boundary_bwd(&content, target.start_byte as usize);
@@ -100,19 +102,24 @@ impl SafeDeleter {
                 end += 1;
             }
 
-            content.drain(start..end);
+            if start > cursor {
+                out.extend_from_slice(&content[cursor..start]);
+            }
+            cursor = cursor.max(end);
             removed += 1;
         }
+        out.extend_from_slice(&content[cursor..]);
 
-        std::fs::write(file_path, &content)?;
+        std::fs::write(file_path, &out)?;
         Ok(removed)
     }
 
     /// Backs up `file_path` (if not already done), then replaces each listed
     /// byte range with the corresponding `ReplacementTarget::replacement` text.
     ///
-    /// Targets are processed **bottom-to-top** (descending `start_byte`) so that
-    /// earlier offsets remain valid after each splice.
+    /// Targets are sorted by ascending `start_byte` and the output is built in
+    /// one pass, interleaving untouched spans with replacement text. A target
+    /// overlapping an earlier one is skipped.
     ///
     /// Returns the number of replacements applied.
     pub fn replace_symbols(
@@ -126,31 +133,30 @@ impl SafeDeleter {
 
         self.ensure_backup(file_path)?;
 
-        let mut content = std::fs::read(file_path)?;
+        let content = std::fs::read(file_path)?;
 
-        // Sort DESCENDING — bottom-to-top.
-        targets.sort_by(|a, b| b.start_byte.cmp(&a.start_byte));
+        targets.sort_by_key(|t| t.start_byte);
 
+        let extra: usize = targets.iter().map(|t| t.replacement.len()).sum();
+        let mut out = Vec::with_capacity(content.len() + extra);
+        let mut cursor = 0usize;
         let mut replaced = 0usize;
         for target in targets.iter() {
             let start = snap_char_boundary_bwd(&content, target.start_byte as usize);
             let end = snap_char_boundary_fwd(&content, target.end_byte as usize);
 
-            if start >= content.len() || end > content.len() || start >= end {
+            if start >= content.len() || end > content.len() || start >= end || start < cursor {
                 continue;
             }
 
-            let replacement = target.replacement.as_bytes();
-            let mut new_content =
-                Vec::with_capacity(content.len() - (end - start) + replacement.len());
-            new_content.extend_from_slice(&content[..start]);
-            new_content.extend_from_slice(replacement);
-            new_content.extend_from_slice(&content[end..]);
-            content = new_content;
+            out.extend_from_slice(&content[cursor..start]);
+            out.extend_from_slice(target.replacement.as_bytes());
+            cursor = end;
             replaced += 1;
         }
+        out.extend_from_slice(&content[cursor..]);
 
-        std::fs::write(file_path, &content)?;
+        std::fs::write(file_path, &out)?;
         Ok(replaced)
     }
 
@@ -210,42 +216,22 @@ impl SafeDeleter {
 
 /// Snaps `offset` backward to the start of the current UTF-8 character.
 ///
-/// Uses `str::is_char_boundary` when the buffer is valid UTF-8 (the common
-/// case for Python source files).  Falls back to the continuation-byte mask
-/// (`0x80–0xBF`) for non-UTF-8 content (e.g. Python 2 latin-1 files).
-fn snap_char_boundary_bwd(buf: &[u8], mut offset: usize) -> usize {
-    match std::str::from_utf8(buf) {
-        Ok(s) => {
-            while offset > 0 && !s.is_char_boundary(offset) {
-                offset -= 1;
-            }
-        }
-        Err(_) => {
-            // Non-UTF-8 fallback: walk backward past continuation bytes.
-            while offset > 0 && (buf[offset] & 0xC0) == 0x80 {
-                offset -= 1;
-            }
-        }
+/// Walks back past continuation bytes (`0x80–0xBF`). For valid UTF-8 this is
+/// exactly `str::is_char_boundary`, and it also works on non-UTF-8 content
+/// (e.g. Python 2 latin-1 files) without validating the whole buffer per call.
+/// Offsets past the end are clamped to `buf.len()`.
+fn snap_char_boundary_bwd(buf: &[u8], offset: usize) -> usize {
+    let mut offset = offset.min(buf.len());
+    while offset > 0 && offset < buf.len() && (buf[offset] & 0xC0) == 0x80 {
+        offset -= 1;
     }
     offset
 }
 
 /// Snaps `offset` forward past any UTF-8 continuation bytes.
-///
-/// Uses `str::is_char_boundary` for valid UTF-8; continuation-byte mask
-/// otherwise.
 fn snap_char_boundary_fwd(buf: &[u8], mut offset: usize) -> usize {
-    match std::str::from_utf8(buf) {
-        Ok(s) => {
-            while offset < buf.len() && !s.is_char_boundary(offset) {
-                offset += 1;
-            }
-        }
-        Err(_) => {
-            while offset < buf.len() && (buf[offset] & 0xC0) == 0x80 {
-                offset += 1;
-            }
-        }
+    while offset < buf.len() && (buf[offset] & 0xC0) == 0x80 {
+        offset += 1;
     }
     offset
 }
@@ -293,6 +279,33 @@ mod tests {
         fs::remove_dir_all(tmp).ok();
     }
 
+    #[test]
+    fn test_nested_target_covered_by_outer() {
+        let tmp = tmp_dir("test_nested_splice");
+        let src = b"class A:\n    def m(self):\n        pass\nx = 1\n";
+        let file = tmp.join("nested.py");
+        fs::write(&file, src).ok();
+
+        let mut deleter = SafeDeleter::new(&tmp).unwrap();
+        let mut targets = vec![
+            DeletionTarget {
+                qualified_name: "A.m".into(),
+                start_byte: 9,
+                end_byte: 39,
+            },
+            DeletionTarget {
+                qualified_name: "A".into(),
+                start_byte: 0,
+                end_byte: 39,
+            },
+        ];
+        let removed = deleter.delete_symbols(&file, &mut targets).unwrap();
+        assert_eq!(removed, 2);
+        assert_eq!(fs::read(&file).unwrap(), b"x = 1\n");
+
+        fs::remove_dir_all(tmp).ok();
+    }
+
     #[test]
     fn test_restore_all() {
         let tmp = tmp_dir("test_restore_all");
@@ -386,6 +399,38 @@ mod tests {
         fs::remove_dir_all(tmp).ok();
     }
 
+    #[test]
+    fn test_replace_symbols_multiple_ranges() {
+        let tmp = tmp_dir("test_replace_multi");
+        let src = b"def a():\n    return 1\ndef b():\n    return 2\n";
+        let file = tmp.join("multi.py");
+        fs::write(&file, src).ok();
+
+        let mut deleter = SafeDeleter::new(&tmp).unwrap();
+        let mut targets = vec![
+            ReplacementTarget {
+                qualified_name: "b".into(),
+                start_byte: 31,
+                end_byte: 44,
+                replacement: "    return _b_impl()\n".into(),
+            },
+            ReplacementTarget {
+                qualified_name: "a".into(),
+                start_byte: 9,
+                end_byte: 22,
+                replacement: "    return _a_impl()\n".into(),
+            },
+        ];
+        let replaced = deleter.replace_symbols(&file, &mut targets).unwrap();
+        assert_eq!(replaced, 2);
+        assert_eq!(
+            fs::read_to_string(&file).unwrap(),
+            "def a():\n    return _a_impl()\ndef b():\n    return _b_impl()\n"
+        );
+
+        fs::remove_dir_all(tmp).ok();
+    }
+
     #[test]
     fn test_utf8_emoji_boundary() {
         // Verify no panic when byte offsets land inside multi-byte emoji sequences.